@@ -0,0 +1,169 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+
+from config import (AUTH_BURST_PER_IP, AUTH_BURST_PER_USERNAME, AUTH_GLOBAL_BURST,
+                    AUTH_GLOBAL_RATE, AUTH_MAX_CONCURRENCY, AUTH_MAX_KEYS,
+                    AUTH_RATE_PER_IP, AUTH_RATE_PER_USERNAME, RATE_LIMIT_REDIS_TIMEOUT,
+                    RATE_LIMIT_REDIS_URL)
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBuckets:
+    """Token bucket в памяти воркера.
+
+    Корзин не больше maxsize: давно не использованные вытесняются,
+    поэтому поток запросов с разных адресов не раздувает память.
+    """
+
+    def __init__(self, maxsize: int):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+
+    async def take(self, key: str, rate: float, burst: int):
+        """Берет токен из корзины: 0 или сколько секунд ждать следующего."""
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Та же корзина, что в MemoryBuckets, но атомарно на стороне Redis и
+# по часам Redis, чтобы часы воркеров не расходились.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token bucket в Redis, общий для всех воркеров.
+
+    Если Redis недоступен или не ответил за timeout секунд, корзины
+    временно берутся из памяти воркера.
+    """
+
+    def __init__(self, url: str, fallback: MemoryBuckets, timeout: float):
+        self._redis = Redis.from_url(url, socket_connect_timeout=timeout,
+                                     socket_timeout=timeout)
+        self._take = self._redis.register_script(TAKE_SCRIPT)
+        self._fallback = fallback
+
+    async def take(self, key: str, rate: float, burst: int):
+        try:
+            return float(await self._take(keys=[f'admission:{key}'], args=[rate, burst]))
+        except Exception as error:
+            logger.warning('Redis для ограничения запросов недоступен: %s', error)
+            return await self._fallback.take(key, rate, burst)
+
+
+class AdmissionControl:
+    """Допуск запросов к дорогим маршрутам до БД и bcrypt.
+
+    Сначала проверяется число одновременных запросов, затем корзины
+    IP, username и общая. Общая проверяется последней, чтобы запросы,
+    отклоненные по IP или username, не тратили ее токены. Она и
+    ограничивает число хэширований в секунду при любом трафике.
+    """
+
+    def __init__(self, buckets, max_concurrency: int, limits: dict):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = dict.fromkeys(('concurrency', *limits), 0)
+
+    def _reject(self, reason: str, retry_after: float):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise HTTPException(detail='Слишком много запросов, повторите попытку позже!',
+                            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                            headers={'Retry-After': str(max(math.ceil(retry_after), 1))})
+
+    @asynccontextmanager
+    async def admit(self, ip: str | None, username: str):
+        """Пропускает запрос или сразу отвечает 429 с Retry-After.
+
+        Корзины общие для всех маршрутов, которые используют этот допуск.
+        """
+
+        with self._lock:
+            admitted = self.in_flight < self.max_concurrency
+            if admitted:
+                self.in_flight += 1
+        if not admitted:
+            self._reject('concurrency', 1)
+
+        try:
+            keys = {'ip': f'ip:{ip}', 'username': f'user:{username}', 'global': 'global'}
+            for reason, (rate, burst) in self.limits.items():
+                if rate > 0:
+                    wait = await self._buckets.take(keys[reason], rate, burst)
+                    if wait:
+                        self._reject(reason, wait)
+            with self._lock:
+                self.admitted += 1
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def status(self):
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+            }
+
+
+def make_buckets():
+    buckets = MemoryBuckets(AUTH_MAX_KEYS)
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBuckets(RATE_LIMIT_REDIS_URL, buckets, RATE_LIMIT_REDIS_TIMEOUT)
+    return buckets
+
+
+auth_admission = AdmissionControl(make_buckets(), AUTH_MAX_CONCURRENCY, {
+    'ip': (AUTH_RATE_PER_IP, AUTH_BURST_PER_IP),
+    'username': (AUTH_RATE_PER_USERNAME, AUTH_BURST_PER_USERNAME),
+    'global': (AUTH_GLOBAL_RATE, AUTH_GLOBAL_BURST),
+})
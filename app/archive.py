@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.exc import OperationalError
+
+from app import crud
+from app.database import SessionLocal
+from app.models import Ad, ArchivedAd, ArchivedComment, Comment
+from config import ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_PAUSE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_AD_COLUMNS = ('id', 'title', 'description', 'owner_id', 'category',
+                       'comment_count', 'expires_at')
+ARCHIVED_COMMENT_COLUMNS = ('id', 'text', 'owner_id', 'ad_id')
+
+# Сколько раз подряд повторять откатившуюся пачку.
+ARCHIVE_RETRIES = 3
+
+
+def archive_batch(db_session, batch_size: int, now: datetime | None = None):
+    """Переносит в архив одну пачку истекших объявлений с комментариями.
+
+    Пачка - одна короткая транзакция. Строки объявлений блокируются
+    FOR UPDATE SKIP LOCKED: параллельные архиваторы берут разные
+    пачки, а новый комментарий к объявлению из пачки ждет только ее
+    коммита и затем получает 404. Возвращает число объявлений.
+    """
+
+    now = now or datetime.now(timezone.utc)
+    ad_ids = db_session.scalars(
+        select(Ad.id).where(Ad.expires_at <= now)
+        .order_by(Ad.expires_at).limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ad_ids:
+        db_session.rollback()
+        return 0
+
+    db_session.execute(insert(ArchivedComment).from_select(
+        [*ARCHIVED_COMMENT_COLUMNS, 'archived_at'],
+        select(*(getattr(Comment, name) for name in ARCHIVED_COMMENT_COLUMNS),
+               literal(now, ArchivedComment.archived_at.type))
+        .where(Comment.ad_id.in_(ad_ids))
+    ))
+    db_session.execute(insert(ArchivedAd).from_select(
+        [*ARCHIVED_AD_COLUMNS, 'archived_at'],
+        select(*(getattr(Ad, name) for name in ARCHIVED_AD_COLUMNS),
+               literal(now, ArchivedAd.archived_at.type))
+        .where(Ad.id.in_(ad_ids))
+    ))
+    # Комментарии удаляются явно: на SQLite ON DELETE CASCADE выключен.
+    db_session.execute(delete(Comment).where(Comment.ad_id.in_(ad_ids))
+                       .execution_options(synchronize_session=False))
+    categories = db_session.scalars(
+        delete(Ad).where(Ad.id.in_(ad_ids)).returning(Ad.category)
+        .execution_options(synchronize_session=False)
+    ).all()
+    crud.count_categories(db_session, {category: -count for category, count
+                                       in Counter(categories).items()})
+    db_session.commit()
+
+    return len(ad_ids)
+
+
+def archive_expired(batch_size: int = ARCHIVE_BATCH_SIZE,
+                    pause: float = ARCHIVE_PAUSE_SECONDS,
+                    max_batches: int | None = None, on_batch=None):
+    """Архивирует истекшие объявления пачками, пока они не кончатся.
+
+    Между пачками выдерживается пауза pause секунд, чтобы архивация
+    не отнимала у запросов диск и реплики успевали за WAL. После
+    каждой пачки вызывается on_batch(всего перенесено объявлений).
+    """
+
+    archived = 0
+    batches = 0
+    failures = 0
+    with SessionLocal() as db_session:
+        while max_batches is None or batches < max_batches:
+            batches += 1
+            try:
+                moved = archive_batch(db_session, batch_size)
+            except OperationalError as error:
+                # Например, взаимоблокировка с удалением комментария:
+                # пачка откатывается целиком и берется заново.
+                db_session.rollback()
+                failures += 1
+                if failures >= ARCHIVE_RETRIES:
+                    raise
+                logger.warning('Пачка архивации откатилась: %s', error)
+                time.sleep(pause)
+                continue
+            failures = 0
+            if not moved:
+                break
+            archived += moved
+            if on_batch:
+                on_batch(archived)
+            time.sleep(pause)
+
+    return archived
+
+
+async def run_archiver(interval: float = ARCHIVE_INTERVAL_SECONDS):
+    """Фоновая задача воркера: архивация раз в interval секунд.
+
+    Работает в отдельном потоке и через синхронный engine в любом
+    режиме БД. Несколько воркеров не мешают друг другу: пачки
+    разбираются через SKIP LOCKED.
+    """
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            archived = await asyncio.to_thread(archive_expired)
+        except Exception:
+            logger.exception('Архивация объявлений не удалась')
+        else:
+            if archived:
+                logger.info('В архив перенесено объявлений: %d', archived)
@@ -1,15 +1,32 @@
+import random
+from collections import Counter
+
 from fastapi import HTTPException, security, Depends
 from jose import JWTError
 from http import HTTPStatus
 
-from sqlalchemy.orm import Session
-
-from app.models import Ad, User, Comment
-from app.security import password_hasher, create_password_hash, decode_token
-from app.database import SessionLocal, get_db
+from sqlalchemy import (REAL, and_, cast, delete, func, insert,
+                        literal, or_, select, text, update)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import schemas
+from app.cache import TTLCache
+from app.models import (Ad, AdCategoryCount, ArchivedAd, ArchivedComment, User,
+                        Comment, SEARCH_CONFIG, CATEGORY_COUNTER_SLOTS)
+from app.security import password_hasher, decode_token
+from app.database import SessionLocal, get_db, run_db
+from config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
 
 oauth2_scheme = security.OAuth2PasswordBearer(tokenUrl="token")
 
+# Авторизованные пользователи по username из токена. Кэш локален для
+# воркера: смена роли сбрасывает запись сразу только в этом процессе,
+# в остальных она устареет не позже чем через PRINCIPAL_CACHE_TTL.
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
 
 def verify_password(plain_password, hashed_password):
     """Проверяет пароль."""
@@ -17,16 +34,56 @@ def verify_password(plain_password, hashed_password):
     return password_hasher.verify(plain_password, hashed_password)
 
 
+# Уникальные индексы users и поле, которое они защищают.
+USER_UNIQUE_FIELDS = {
+    'ix_users_username': 'username',
+    'ix_users_email': 'email',
+}
+
+
+def _unique_violation_field(exc: IntegrityError):
+    """Поле пользователя, уникальность которого нарушена вставкой."""
+
+    orig = exc.orig
+    # psycopg2 отдает имя ограничения в diag, asyncpg - в исключении,
+    # которое адаптер SQLAlchemy кладет в __cause__.
+    diag = getattr(orig, 'diag', None)
+    constraint = (getattr(diag, 'constraint_name', None)
+                  or getattr(orig.__cause__, 'constraint_name', None))
+    if constraint in USER_UNIQUE_FIELDS:
+        return USER_UNIQUE_FIELDS[constraint]
+
+    message = str(orig)
+    for field in ('username', 'email'):
+        if field in message:
+            return field
+    return None
+
+
 def create_user(db_session, username: str,
-                email: str, password: str):
-    """Создает пользователя."""
+                email: str, hashed_password: str):
+    """Создает пользователя одним INSERT ... RETURNING.
 
-    hashed_password = create_password_hash(password)
-    db_user = User(username=username, email=email,
-                   hashed_password=hashed_password)
-    db_session.add(db_user)
-    db_session.commit()
-    db_session.refresh(db_user)
+    Пароль хэшируется заранее, вне транзакции и вне event loop.
+    Занятые username и email проверяет уникальный индекс, а не
+    предварительный SELECT, поэтому одновременные регистрации
+    не проходят обе.
+    """
+
+    try:
+        db_user = db_session.scalar(
+            insert(User).values(username=username, email=email,
+                                hashed_password=hashed_password)
+            .returning(User)
+        )
+        db_session.commit()
+    except IntegrityError as exc:
+        db_session.rollback()
+        field = _unique_violation_field(exc)
+        if field is None:
+            raise
+        raise HTTPException(detail=f'Пользователь с таким {field} уже зарегистрирован!',
+                            status_code=HTTPStatus.BAD_REQUEST)
     return db_user
 
 
@@ -36,14 +93,12 @@ def get_user_by_username(db_session: SessionLocal, username: str):
     return db_session.query(User).filter(User.username == username).first()
 
 
-def get_user_by_email(db_session: SessionLocal, email: str):
-    """Получение пользователя по его email."""
+async def get_current_user(token: str = Depends(oauth2_scheme), db_session: SessionLocal = Depends(get_db)):
+    """Получение текущего пользователя.
 
-    return db_session.query(User).filter(User.email == email).first()
-
-
-def get_current_user(token: str = Depends(oauth2_scheme), db_session: SessionLocal = Depends(get_db)):
-    """Получение текущего пользователя."""
+    Повторные запросы с тем же токеном обслуживаются из кэша без
+    обращения к БД.
+    """
 
     try:
         get_data = decode_token(token)
@@ -53,62 +108,309 @@ def get_current_user(token: str = Depends(oauth2_scheme), db_session: SessionLoc
 
     username = get_data.get('username')
 
-    user = db_session.query(User).filter(User.username == username).first()
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
 
-    if not user:
+    db_user = await run_db(db_session, get_user_by_username, username)
+
+    if not db_user:
         raise HTTPException(detail='Пользователь не найден!',
                             status_code=HTTPStatus.NOT_FOUND)
+
+    user = schemas.User.model_validate(db_user, from_attributes=True)
+    principal_cache.set(username, user)
     return user
 
 
-def get_ad(db_session: Session, ad_id: int):
-    """Получения объявления по id."""
+# Быстрый путь чтения: только нужные колонки через Core, без
+# ORM-объектов и без валидации Pydantic. Словари уже имеют форму
+# schemas.AdRead / schemas.CommentRead, а типы гарантирует схема БД.
+AD_READ_COLUMNS = (
+    Ad.id, Ad.title, Ad.description, Ad.comment_count, Ad.expires_at, Ad.version,
+    User.id.label('owner_id'), User.username, User.email, User.role,
+    User.version.label('owner_version'),
+)
+COMMENT_READ_COLUMNS = (
+    Comment.id, Comment.text,
+    User.id.label('user_id'), User.username, User.email, User.role,
+    Ad.id.label('ad_id'), Ad.title, Ad.description,
+)
+
+
+def _user_dict(user_id, row):
+    if user_id is None:
+        return None
+    return {'username': row.username, 'email': row.email,
+            'role': row.role, 'id': user_id}
+
+
+def _ad_dict(row):
+    return {
+        'title': row.title,
+        'description': row.description,
+        'id': row.id,
+        'comment_count': row.comment_count,
+        'expires_at': row.expires_at,
+        'owner': _user_dict(row.owner_id, row),
+    }
+
+
+def _comment_dict(row):
+    return {
+        'text': row.text,
+        'id': row.id,
+        'user': _user_dict(row.user_id, row),
+        'ad': {'title': row.title, 'description': row.description,
+               'id': row.ad_id} if row.ad_id is not None else None,
+    }
+
+
+def get_ad_fast(db_session: Session, ad_id: int):
+    """Объявление в виде словаря и версии строк для ETag."""
+
+    row = db_session.execute(
+        select(*AD_READ_COLUMNS)
+        .outerjoin(User, User.id == Ad.owner_id)
+        .where(Ad.id == ad_id)
+    ).first()
+    if not row:
+        raise HTTPException(detail='Объявление не найдено!',
+                            status_code=HTTPStatus.NOT_FOUND)
 
-    ad = db_session.query(Ad).get(ad_id)
-    if not ad:
+    return _ad_dict(row), (row.version, row.owner_version)
+
+
+def _filter_ads(statement, after_id: int | None = None,
+                category: schemas.TitleEnum | None = None,
+                owner_id: int | None = None):
+    # Фильтр по равенству и id > after_id читаются одним диапазоном
+    # индекса (category, id) или (owner_id, id), уже упорядоченным по id.
+    if after_id is not None:
+        statement = statement.where(Ad.id > after_id)
+    if category is not None:
+        statement = statement.where(Ad.category == category)
+    if owner_id is not None:
+        statement = statement.where(Ad.owner_id == owner_id)
+    return statement
+
+
+def get_ads_fast(db_session, limit: int, after_id: int | None = None,
+                 category: schemas.TitleEnum | None = None,
+                 owner_id: int | None = None):
+    """Страница объявлений в виде словарей."""
+
+    statement = _filter_ads(
+        select(*AD_READ_COLUMNS).outerjoin(User, User.id == Ad.owner_id),
+        after_id, category, owner_id)
+
+    rows = db_session.execute(statement.order_by(Ad.id).limit(limit + 1)).all()
+    return [_ad_dict(row) for row in rows]
+
+
+def get_ad_version(db_session: Session, ad_id: int):
+    """Версии объявления и его владельца без загрузки самих строк."""
+
+    versions = db_session.execute(
+        select(Ad.version, User.version)
+        .outerjoin(User, User.id == Ad.owner_id)
+        .where(Ad.id == ad_id)
+    ).first()
+    if not versions:
         raise HTTPException(detail='Объявление не найдено!',
                             status_code=HTTPStatus.NOT_FOUND)
 
-    return ad
+    return tuple(versions)
+
+
+def select_ads(after_id: int | None = None,
+               category: schemas.TitleEnum | None = None,
+               owner_id: int | None = None):
+    """Запрос всех объявлений после after_id для потоковой выгрузки."""
+
+    return _filter_ads(select(Ad).options(joinedload(Ad.owner)).order_by(Ad.id),
+                       after_id, category, owner_id)
+
+
+def search_ads(db_session, q: str, limit: int,
+               after: tuple[float, int] | None = None):
+    """Полнотекстовый поиск объявлений по title и description.
+
+    Совпадения ищутся по GIN-индексу, результат упорядочен по
+    релевантности. Возвращает пары (объявление, ранг).
+    """
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Ad.search_vector, ts_query).label('rank')
+
+    query = db_session.query(Ad, rank).options(joinedload(Ad.owner)).filter(
+        Ad.search_vector.op('@@')(ts_query))
+    if after is not None:
+        # ts_rank возвращает real: параметр приводится к нему же,
+        # иначе ранг из курсора не совпадет с рангом в БД.
+        after_rank, after_id = cast(after[0], REAL), after[1]
+        query = query.filter(or_(rank < after_rank,
+                                 and_(rank == after_rank, Ad.id > after_id)))
+
+    return query.order_by(rank.desc(), Ad.id).limit(limit + 1).all()
+
+
+def ad_category(title: str):
+    """Категория объявления по title, None для произвольного title."""
+
+    try:
+        return schemas.TitleEnum(title)
+    except ValueError:
+        return None
+
 
+def _insert_statement(db_session):
+    dialect = db_session.get_bind().dialect.name
+    return (postgresql if dialect == 'postgresql' else sqlite).insert(AdCategoryCount)
+
+
+def count_categories(db_session, categories):
+    """Прибавляет к счетчикам категорий в текущей транзакции.
+
+    categories - словарь категория -> изменение. Каждая категория
+    попадает в случайный слот, так что параллельные вставки почти
+    не ждут друг друга.
+    """
+
+    rows = [{'category': category, 'slot': random.randrange(CATEGORY_COUNTER_SLOTS),
+             'count': delta}
+            for category, delta in categories.items() if category is not None and delta]
+    if not rows:
+        return
+
+    statement = _insert_statement(db_session).values(rows)
+    db_session.execute(statement.on_conflict_do_update(
+        index_elements=[AdCategoryCount.category, AdCategoryCount.slot],
+        set_={'count': AdCategoryCount.count + statement.excluded.count},
+    ))
+
+
+def get_category_counts(db_session):
+    """Количество объявлений по категориям из счетчиков."""
+
+    counts = dict(db_session.execute(
+        select(AdCategoryCount.category, func.sum(AdCategoryCount.count))
+        .group_by(AdCategoryCount.category)
+    ).all())
+
+    return [{'category': category, 'count': int(counts.get(category) or 0)}
+            for category in schemas.TitleEnum]
+
+
+def recount_categories(db_session):
+    """Пересобирает счетчики категорий по таблице ads.
+
+    На PostgreSQL таблица счетчиков блокируется от записи до конца
+    пересчета, чтобы вставки не потерялись между DELETE и INSERT.
+    Возвращает количество объявлений с категорией.
+    """
+
+    if db_session.get_bind().dialect.name == 'postgresql':
+        db_session.execute(text('LOCK TABLE ad_category_counts IN EXCLUSIVE MODE'))
+    db_session.execute(delete(AdCategoryCount))
+    db_session.execute(insert(AdCategoryCount).from_select(
+        ['category', 'slot', 'count'],
+        select(Ad.category, literal(0), func.count())
+        .where(Ad.category.is_not(None))
+        .group_by(Ad.category)
+    ))
+    total = db_session.scalar(select(func.coalesce(func.sum(AdCategoryCount.count), 0)))
+    db_session.commit()
 
-def get_ads(db_session):
-    """Получение списка всех объявлений."""
+    return total
 
-    return db_session.query(Ad).all()
 
+def create_ad(db_session, title: str, description: str, owner: schemas.User):
+    """Создание объявления.
 
-def create_ad(db_session, title: str, description: str, owner_id: int):
-    """Создание объявления."""
+    Счетчик категории увеличивается в той же транзакции. Владелец -
+    уже авторизованный пользователь, поэтому в ответ он подставляется
+    без запроса к БД.
+    """
 
-    db_ad = Ad(title=title, description=description, owner_id=owner_id)
+    category = ad_category(title)
+    db_ad = Ad(title=title, description=description, owner_id=owner.id,
+               category=category)
     db_session.add(db_ad)
+    db_session.flush()
+    count_categories(db_session, {category: 1})
     db_session.commit()
-    db_session.refresh(db_ad)
+    set_committed_value(db_ad, 'owner', owner)
 
     return db_ad
 
 
-def delete_ad(db_session, ad_id: int, user: User):
-    """Удаление объяления."""
+def create_ads(db_session, ads: list[dict], owner: schemas.User):
+    """Создание пачки объявлений одним INSERT ... RETURNING.
 
-    ad = db_session.query(Ad).filter(Ad.id == ad_id).first()
-    if ad:
-        if ad.owner_id == user.id or user.is_admin:
-            db_session.delete(ad)
-            db_session.commit()
-        else:
-            raise HTTPException(detail='Не прав на удаление объявления!',
-                                status_code=HTTPStatus.BAD_REQUEST)
+    Все объявления создаются в одной транзакции: либо все, либо ни одного.
+    Ответ идет в порядке входного списка: RETURNING сам по себе порядок
+    строк не гарантирует.
+    """
 
+    rows = [{'title': ad['title'], 'description': ad['description'],
+             'owner_id': owner.id, 'category': ad_category(ad['title'])}
+            for ad in ads]
+    if db_session.get_bind().dialect.name == 'sqlite':
+        # SQLite упорядочить RETURNING не умеет и вставлял бы по строке.
+        # id он выдает по порядку VALUES, поэтому хватает сортировки по id.
+        db_ads = sorted(db_session.scalars(insert(Ad).returning(Ad), rows),
+                        key=lambda db_ad: db_ad.id)
     else:
-        raise HTTPException(detail='Объявление не найдено!',
-                            status_code=HTTPStatus.NOT_FOUND)
+        db_ads = db_session.scalars(
+            insert(Ad).returning(Ad, sort_by_parameter_order=True), rows).all()
+    count_categories(db_session, Counter(row['category'] for row in rows))
+    db_session.commit()
+
+    for db_ad in db_ads:
+        set_committed_value(db_ad, 'owner', owner)
+
+    return db_ads
+
+
+def _is_admin(user_id: int):
+    # Роль читается из users в том же запросе, а не из кэша
+    # пользователей: снятая в другом воркере роль действует сразу.
+    return (select(User.id)
+            .where(User.id == user_id, User.role == schemas.RoleEnum.admin.value)
+            .exists())
+
+
+def delete_ad(db_session, ad_id: int, user: schemas.User):
+    """Удаление объяления.
+
+    Права проверяются в том же DELETE, комментарии удаляет
+    ON DELETE CASCADE, счетчик категории уменьшается в той же
+    транзакции. Отдельный SELECT нужен, только если ничего
+    не удалилось: чтобы отличить "не найдено" от "нет прав".
+    """
+
+    deleted = db_session.execute(
+        delete(Ad)
+        .where(Ad.id == ad_id,
+               or_(Ad.owner_id == user.id, _is_admin(user.id)))
+        .returning(Ad.category)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted is None:
+        if db_session.scalar(select(Ad.id).where(Ad.id == ad_id)) is None:
+            raise HTTPException(detail='Объявление не найдено!',
+                                status_code=HTTPStatus.NOT_FOUND)
+        raise HTTPException(detail='Не прав на удаление объявления!',
+                            status_code=HTTPStatus.BAD_REQUEST)
+
+    count_categories(db_session, {deleted.category: -1})
+    db_session.commit()
 
 
 def update_user_role(db_session: SessionLocal,
                      user_id: int, role: str,
-                     current_user: User):
+                     current_user: schemas.User):
     """Изменение роли пользователя только админом."""
 
     user = db_session.query(User).filter(User.id == user_id).first()
@@ -122,16 +424,19 @@ def update_user_role(db_session: SessionLocal,
 
     user.role = role
     db_session.commit()
-    db_session.refresh(user)
+    principal_cache.pop(user.username)
 
-    return user
+    return db_session.query(User).options(
+        selectinload(User.ads), selectinload(User.comments)
+    ).filter(User.id == user_id).one()
 
 
 def get_comment(db_session: SessionLocal, comment_id):
     """Получает определенный комментарий."""
 
-    comment = db_session.query(Comment).filter(
-        Comment.id == comment_id).first()
+    comment = db_session.query(Comment).options(
+        joinedload(Comment.user), joinedload(Comment.ad)
+    ).filter(Comment.id == comment_id).first()
     if not comment:
         raise HTTPException(detail='Комментарий не найден!',
                             status_code=HTTPStatus.NOT_FOUND)
@@ -139,43 +444,191 @@ def get_comment(db_session: SessionLocal, comment_id):
     return comment
 
 
-def get_comments(db_session: SessionLocal):
-    """Получает все комментарии."""
+def get_comments_fast(db_session: SessionLocal, limit: int,
+                      after_id: int | None = None):
+    """Страница комментариев в виде словарей."""
+
+    statement = (
+        select(*COMMENT_READ_COLUMNS)
+        .outerjoin(User, User.id == Comment.owner_id)
+        .outerjoin(Ad, Ad.id == Comment.ad_id)
+    )
+    if after_id is not None:
+        statement = statement.where(Comment.id > after_id)
+
+    rows = db_session.execute(statement.order_by(Comment.id).limit(limit + 1)).all()
+    return [_comment_dict(row) for row in rows]
+
+
+def get_comment_version(db_session: SessionLocal, comment_id: int):
+    """Версии комментария, его автора и объявления."""
+
+    versions = db_session.execute(
+        select(Comment.version, User.version, Ad.version)
+        .outerjoin(User, User.id == Comment.owner_id)
+        .outerjoin(Ad, Ad.id == Comment.ad_id)
+        .where(Comment.id == comment_id)
+    ).first()
+    if not versions:
+        raise HTTPException(detail='Комментарий не найден!',
+                            status_code=HTTPStatus.NOT_FOUND)
+
+    return tuple(versions)
+
+
+def select_comments(after_id: int | None = None):
+    """Запрос всех комментариев после after_id для потоковой выгрузки."""
+
+    statement = select(Comment).options(
+        joinedload(Comment.user), joinedload(Comment.ad)
+    ).order_by(Comment.id)
+    if after_id is not None:
+        statement = statement.where(Comment.id > after_id)
+
+    return statement
+
+
+def get_ad_comments(db_session: SessionLocal, ad_id: int, limit: int,
+                    after_id: int | None = None):
+    """Получает страницу комментариев к объявлению.
+
+    Страница читается по индексу (ad_id, id). Существование
+    объявления проверяется, только если комментариев не нашлось.
+    """
 
-    return db_session.query(Comment).all()
+    query = db_session.query(Comment).options(
+        joinedload(Comment.user), joinedload(Comment.ad)
+    ).filter(Comment.ad_id == ad_id)
+    if after_id is not None:
+        query = query.filter(Comment.id > after_id)
+
+    comments = query.order_by(Comment.id).limit(limit + 1).all()
+    if not comments and not db_session.get(Ad, ad_id):
+        raise HTTPException(detail='Объявление не найдено!',
+                            status_code=HTTPStatus.NOT_FOUND)
+
+    return comments
 
 
 def create_comment(db_session: SessionLocal, comment: str,
                    user_id: int, ad_id: int):
-    """Создание комментариев."""
-
-    ad = db_session.query(Ad).get(ad_id)
-    if not ad:
+    """Создание комментариев.
+
+    Счетчик комментариев объявления увеличивается в той же
+    транзакции, UPDATE заодно проверяет, что объявление существует.
+    """
+
+    result = db_session.execute(
+        update(Ad).where(Ad.id == ad_id)
+        .values(comment_count=Ad.comment_count + 1,
+                version=Ad.version + 1)
+    )
+    if not result.rowcount:
         raise HTTPException(detail='Объявление не найдено!',
                             status_code=HTTPStatus.NOT_FOUND)
 
     db_comment = Comment(text=comment, owner_id=user_id, ad_id=ad_id)
     db_session.add(db_comment)
     db_session.commit()
-    db_session.refresh(db_comment)
+    db_session.refresh(db_comment, ['user', 'ad'])
 
     return db_comment
 
 
-def delete_comment(db_session: SessionLocal, comment_id: int, user_id: int):
-    """Удаление комментария."""
+def delete_comment(db_session: SessionLocal, comment_id: int,
+                   user: schemas.User):
+    """Удаление комментария.
+
+    Права проверяются в том же DELETE, счетчик объявления
+    уменьшается в той же транзакции.
+    """
+
+    deleted = db_session.execute(
+        delete(Comment)
+        .where(Comment.id == comment_id,
+               or_(Comment.owner_id == user.id, _is_admin(user.id)))
+        .returning(Comment.ad_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted is None:
+        if db_session.scalar(select(Comment.id).where(Comment.id == comment_id)) is None:
+            raise HTTPException(detail='Комментрарий не найден!',
+                                status_code=HTTPStatus.NOT_FOUND)
+        raise HTTPException(detail='Нет прав на удаление комментария!',
+                            status_code=HTTPStatus.BAD_REQUEST)
+
+    db_session.execute(
+        update(Ad).where(Ad.id == deleted.ad_id)
+        .values(comment_count=Ad.comment_count - 1,
+                version=Ad.version + 1)
+    )
+    db_session.commit()
 
-    comment = db_session.query(Comment).filter(
-        Comment.id == comment_id).first()
-    user = db_session.query(User).filter(User.id == user_id).first()
 
-    if comment:
-        if comment.user.id == user.id or user.is_admin:
-            db_session.delete(comment)
-            db_session.commit()
-        else:
-            raise HTTPException(detail='Нет прав на удаление комментария!',
-                                status_code=HTTPStatus.BAD_REQUEST)
-    else:
-        raise HTTPException(detail='Комментрарий не найден!',
+def recount_comments(db_session: SessionLocal, batch_size: int = 1000):
+    """Пересчитывает счетчики комментариев у объявлений.
+
+    Объявления обходятся диапазонами id, каждый диапазон - отдельная
+    короткая транзакция. Возвращает количество исправленных объявлений.
+    """
+
+    actual_count = (
+        select(func.count(Comment.id))
+        .where(Comment.ad_id == Ad.id)
+        .scalar_subquery()
+    )
+    last_id = db_session.scalar(select(func.max(Ad.id))) or 0
+
+    fixed = 0
+    for start in range(0, last_id, batch_size):
+        result = db_session.execute(
+            update(Ad)
+            .where(Ad.id > start, Ad.id <= start + batch_size,
+                   Ad.comment_count != actual_count)
+            .values(comment_count=actual_count, version=Ad.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db_session.commit()
+        fixed += result.rowcount
+
+    return fixed
+
+
+def get_archived_ads(db_session, limit: int, after_id: int | None = None,
+                     owner_id: int | None = None):
+    """Получение страницы объявлений из архива."""
+
+    query = db_session.query(ArchivedAd)
+    if after_id is not None:
+        query = query.filter(ArchivedAd.id > after_id)
+    if owner_id is not None:
+        query = query.filter(ArchivedAd.owner_id == owner_id)
+
+    return query.order_by(ArchivedAd.id).limit(limit + 1).all()
+
+
+def get_archived_ad(db_session, ad_id: int):
+    """Получение объявления из архива по id."""
+
+    ad = db_session.get(ArchivedAd, ad_id)
+    if not ad:
+        raise HTTPException(detail='Объявление не найдено в архиве!',
+                            status_code=HTTPStatus.NOT_FOUND)
+
+    return ad
+
+
+def get_archived_ad_comments(db_session, ad_id: int, limit: int,
+                             after_id: int | None = None):
+    """Получает страницу комментариев к объявлению из архива."""
+
+    query = db_session.query(ArchivedComment).filter(ArchivedComment.ad_id == ad_id)
+    if after_id is not None:
+        query = query.filter(ArchivedComment.id > after_id)
+
+    comments = query.order_by(ArchivedComment.id).limit(limit + 1).all()
+    if not comments and not db_session.get(ArchivedAd, ad_id):
+        raise HTTPException(detail='Объявление не найдено в архиве!',
                             status_code=HTTPStatus.NOT_FOUND)
+
+    return comments
@@ -1,21 +1,216 @@
-from sqlalchemy import create_engine
+import itertools
+
+from fastapi import Request
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-from config import DB_USER, DB_PORT, DB_HOST, DB_PASSWORD, DB_NAME
+from app import metrics, querylog
+from app.pool import (InstrumentedQueuePool,
+                      InstrumentedAsyncAdaptedQueuePool, pool_status)
+from app.replica import reads_from_primary
+from config import (DATABASE_URL, DB_USER, DB_PORT, DB_HOST, DB_PASSWORD, DB_NAME, DB_ASYNC,
+                    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+                    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_REPLICA_URLS)
 
 SQLALCHEMY_DATABASE_URL = (f'postgresql://{DB_USER}:'
                            f'{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
+SQLALCHEMY_ASYNC_DATABASE_URL = (f'postgresql+asyncpg://{DB_USER}:'
+                                 f'{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
+
+# Асинхронный драйвер для URL, заданного целиком через DATABASE_URL.
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_url(url):
+    """Тот же URL с асинхронным драйвером."""
+
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+if DATABASE_URL:
+    SQLALCHEMY_DATABASE_URL = make_url(DATABASE_URL)
+    SQLALCHEMY_ASYNC_DATABASE_URL = async_url(DATABASE_URL)
+
+POOL_OPTIONS = {
+    'pool_size': DB_POOL_SIZE,
+    'max_overflow': DB_MAX_OVERFLOW,
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'pool_recycle': DB_POOL_RECYCLE,
+    'pool_pre_ping': DB_POOL_PRE_PING,
+}
+
+
+def _instrument(sync_engine):
+    # Бюджет запросов проверяется до того, как metrics начнет замер.
+    querylog.instrument_engine(sync_engine)
+    metrics.instrument_engine(sync_engine)
+
+
+def make_engine(url):
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+    _instrument(engine)
+    return engine
+
+
+def make_async_engine(url):
+    engine = create_async_engine(
+        url, poolclass=InstrumentedAsyncAdaptedQueuePool, **POOL_OPTIONS)
+    _instrument(engine.sync_engine)
+    return engine
+
+
+def make_sessionmaker(engine):
+    # Объекты отдаются на сериализацию уже после commit, поэтому их
+    # состояние не сбрасывается: это лишние SELECT, а в async-режиме
+    # догрузка атрибутов вне сессии и вовсе невозможна.
+    return sessionmaker(autocommit=False, autoflush=False,
+                        expire_on_commit=False, bind=engine)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def make_async_sessionmaker(engine):
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = make_sessionmaker(engine)
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    async_engine = make_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+    AsyncSessionLocal = make_async_sessionmaker(async_engine)
+
+# Реплики только для чтения. Запросы раскидываются по ним по кругу.
+replica_engines = []
+replica_sessions = None
+if DB_REPLICA_URLS:
+    if DB_ASYNC:
+        replica_engines = [make_async_engine(async_url(url)) for url in DB_REPLICA_URLS]
+        replica_sessions = itertools.cycle(
+            [make_async_sessionmaker(replica) for replica in replica_engines])
+    else:
+        replica_engines = [make_engine(url) for url in DB_REPLICA_URLS]
+        replica_sessions = itertools.cycle(
+            [make_sessionmaker(replica) for replica in replica_engines])
 
 Base = declarative_base()
 
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+
+def _read_sessionmaker(request: Request, primary):
+    if replica_sessions is None or reads_from_primary(request):
+        return primary
+    return next(replica_sessions)
+
+
+def get_sync_read_db(request: Request):
+    db = _read_sessionmaker(request, SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    async with _read_sessionmaker(request, AsyncSessionLocal)() as db:
+        yield db
+
+
+# Сессия для безопасных GET: реплика, если она настроена и клиент
+# недавно ничего не менял, иначе основная БД.
+get_read_db = get_async_read_db if DB_ASYNC else get_sync_read_db
+
+
+def get_pool_status():
+    """Состояние пула соединений, которым пользуются запросы."""
+
+    active_engine = async_engine.sync_engine if DB_ASYNC else engine
+    return pool_status(active_engine.pool)
+
+
+def get_replica_pool_status():
+    """Состояние пулов соединений с репликами."""
+
+    return [pool_status((replica.sync_engine if DB_ASYNC else replica).pool)
+            for replica in replica_engines]
+
+
+def _sync_engines():
+    engines = [engine, async_engine, *replica_engines]
+    return [item.sync_engine if DB_ASYNC and item is not engine else item
+            for item in engines if item is not None]
+
+
+def reset_engines_after_fork():
+    """Новые пулы соединений в дочернем процессе.
+
+    Соединения, открытые до fork, принадлежат родителю: close=False
+    забывает их, не закрывая, чтобы не оборвать его сессии.
+    """
+
+    for item in _sync_engines():
+        item.dispose(close=False)
+
+
+async def close_engines():
+    """Закрывает соединения всех пулов при остановке воркера."""
+
+    if DB_ASYNC:
+        for item in [async_engine, *replica_engines]:
+            await item.dispose()
+        engine.dispose()
+    else:
+        for item in [engine, *replica_engines]:
+            item.dispose()
+
+
+async def stream_scalars(db_session, statement, batch_size: int = 1000):
+    """Читает выборку серверным курсором и отдает ее пачками."""
+
+    statement = statement.execution_options(yield_per=batch_size)
+
+    if isinstance(db_session, AsyncSession):
+        result = await db_session.stream_scalars(statement)
+        async for rows in result.partitions():
+            yield rows
+        return
+
+    result = await run_in_threadpool(db_session.scalars, statement)
+    partitions = result.partitions()
+    while (rows := await run_in_threadpool(next, partitions, None)) is not None:
+        yield rows
+
+
+async def run_db(db_session, func, *args, **kwargs):
+    """Выполняет функцию из crud, не блокируя event loop.
+
+    С AsyncSession функция работает поверх asyncpg через run_sync,
+    с обычной Session - в пуле потоков, как и раньше.
+    """
+
+    if isinstance(db_session, AsyncSession):
+        return await db_session.run_sync(func, *args, **kwargs)
+    return await run_in_threadpool(func, db_session, *args, **kwargs)
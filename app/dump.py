@@ -0,0 +1,155 @@
+import csv
+import enum
+import io
+import json
+
+from sqlalchemy import func, select
+
+from app.models import Ad, Comment, User
+
+# Порядок важен для импорта: сначала таблицы, на которые ссылаются.
+TABLES = {
+    'users': User.__table__,
+    'ads': Ad.__table__,
+    'comments': Comment.__table__,
+}
+
+FORMATS = ('ndjson', 'csv')
+
+
+def dump_columns(table):
+    """Колонки, которые выгружаются: вычисляемые БД пересчитает сама."""
+
+    return [column for column in table.columns if column.computed is None]
+
+
+def export_table(connection, table, out, fmt: str = 'ndjson',
+                 after_id: int = 0, batch_size: int = 1000,
+                 on_batch=None):
+    """Потоково выгружает строки таблицы с id больше after_id.
+
+    Строки читаются серверным курсором пачками по batch_size, поэтому
+    память не растет с размером таблицы. После каждой пачки
+    вызывается on_batch(последний id, количество строк).
+    """
+
+    columns = dump_columns(table)
+    names = [column.name for column in columns]
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        if not after_id:
+            writer.writerow(names)
+
+    def value(item):
+        # Enum выгружается меткой типа в БД, как его ждет COPY при импорте.
+        return item.name if isinstance(item, enum.Enum) else item
+
+    result = connection.execution_options(yield_per=batch_size).execute(
+        select(*columns).where(table.c.id > after_id).order_by(table.c.id)
+    )
+
+    exported = 0
+    for rows in result.partitions():
+        for row in rows:
+            row = [value(item) for item in row]
+            if writer:
+                writer.writerow(['' if item is None else item for item in row])
+            else:
+                out.write(json.dumps(dict(zip(names, row)), default=str,
+                                     ensure_ascii=False) + '\n')
+        out.flush()
+        exported += len(rows)
+        if on_batch:
+            on_batch(rows[-1].id, exported)
+
+    return exported
+
+
+def read_rows(source, fmt: str = 'ndjson'):
+    """Читает выгрузку построчно, не загружая файл целиком."""
+
+    if fmt == 'csv':
+        for row in csv.DictReader(source):
+            yield {name: (value if value != '' else None)
+                   for name, value in row.items()}
+        return
+
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def import_table(engine, table, rows, after_id: int = 0,
+                 batch_size: int = 10000, on_batch=None):
+    """Загружает строки в таблицу через COPY пачками по batch_size.
+
+    Каждая пачка - отдельная транзакция. Строки с id не больше
+    after_id или уже загруженного в таблицу id пропускаются, поэтому
+    прерванную загрузку можно продолжить, даже если пачка успела
+    закоммититься, а контрольная точка - нет. Выгрузка идет по
+    возрастанию id, поэтому строка с id не больше уже прочитанного -
+    повтор, и она тоже пропускается.
+    """
+
+    names = [column.name for column in dump_columns(table)]
+    with engine.connect() as connection:
+        loaded_id = connection.scalar(select(func.max(table.c.id)))
+    after_id = max(after_id, loaded_id or 0)
+    copy_sql = f'COPY {table.name} ({", ".join(names)}) FROM STDIN'
+
+    def flush(batch):
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write('\t'.join(_copy_value(row.get(name)) for name in names) + '\n')
+        buffer.seek(0)
+
+        connection = engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(copy_sql, buffer)
+            connection.commit()
+        finally:
+            connection.close()
+
+    imported = 0
+    batch = []
+    last_id = after_id
+    for row in rows:
+        if int(row['id']) <= last_id:
+            continue
+        last_id = int(row['id'])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush(batch)
+            imported += len(batch)
+            if on_batch:
+                on_batch(int(batch[-1]['id']), imported)
+            batch = []
+
+    if batch:
+        flush(batch)
+        imported += len(batch)
+        if on_batch:
+            on_batch(int(batch[-1]['id']), imported)
+
+    # id пришли из выгрузки, последовательность нужно догнать до них.
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce(max(id), 0) + 1, false) FROM {table.name}"
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+    return imported
@@ -0,0 +1,23 @@
+from starlette.responses import Response
+
+
+def make_etag(*versions):
+    """Строгий ETag из версий строк, из которых собран ответ."""
+
+    return '"' + '.'.join(str(version) for version in versions) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str):
+    """Проверяет заголовок If-None-Match (слабое сравнение, RFC 9110)."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(','))
+    return etag in (tag.removeprefix('W/') for tag in candidates)
+
+
+def not_modified(etag: str):
+    return Response(status_code=304, headers={'ETag': etag})
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from config import HASH_WORKERS, HASH_QUEUE_SIZE
+
+
+class HashingPool:
+    """Отдельный ограниченный пул потоков для bcrypt.
+
+    bcrypt отпускает GIL, поэтому потоков достаточно, а отдельный пул
+    не дает волне логинов занять общий threadpool Starlette.
+    Если очередь заполнена, запрос сразу получает 503.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_time = 0.0
+        self.max_hash_time = 0.0
+        self.wait_time = 0.0
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise HTTPException(detail='Сервис перегружен, повторите попытку позже!',
+                                    status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                                    headers={'Retry-After': '1'})
+            self.pending += 1
+
+        # Место освобождает сам _call, когда хэширование закончится:
+        # если клиент отключился, задача все равно остается в очереди.
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, self._call,
+                                          time.perf_counter(), func, args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        return await future
+
+    def _call(self, queued_at: float, func, args):
+        start = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_time += start - queued_at
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.running -= 1
+                self.pending -= 1
+                self.completed += 1
+                self.hash_time += elapsed
+                self.max_hash_time = max(self.max_hash_time, elapsed)
+
+    def status(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'running': self.running,
+                'queue_depth': self.pending - self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'hash_time': self.hash_time,
+                'max_hash_time': self.max_hash_time,
+                'wait_time': self.wait_time,
+            }
+
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_QUEUE_SIZE)
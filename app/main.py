@@ -1,9 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from app.routers import ads, auth, comments, users
 
-app = FastAPI()
+from app import database
+from app.archive import run_archiver
+from app.metrics import MetricsMiddleware
+from app.replica import ReadYourWritesMiddleware
+from app.routers import ads, archive, auth, comments, metrics, monitoring, users
+from config import ARCHIVE_INTERVAL_SECONDS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    archiver = None
+    if ARCHIVE_INTERVAL_SECONDS:
+        archiver = asyncio.create_task(run_archiver())
+    yield
+    if archiver is not None:
+        archiver.cancel()
+        with suppress(asyncio.CancelledError):
+            await archiver
+    # Воркер останавливается или перезапускается после max_requests:
+    # соединения закрываются сразу, а не по таймауту на стороне БД.
+    await database.close_engines()
+
+
+def create_app():
+    """Собирает приложение: middleware и роутеры."""
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(auth.router)
+    app.include_router(users.router)
+    app.include_router(ads.router)
+    app.include_router(comments.router)
+    app.include_router(archive.router)
+    app.include_router(monitoring.router)
+    app.include_router(metrics.router)
+
+    return app
+
 
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(ads.router)
-app.include_router(comments.router)
+app = create_app()
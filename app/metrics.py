@@ -0,0 +1,238 @@
+import time
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import (CounterMetricFamily, GaugeMetricFamily,
+                                    SummaryMetricFamily)
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса',
+    ['method', 'route'],
+)
+REQUESTS = Counter(
+    'http_requests', 'Ответы по кодам', ['method', 'route', 'status'],
+)
+IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Запросы, которые обрабатываются сейчас',
+    multiprocess_mode='livesum',
+)
+REQUEST_QUERIES = Histogram(
+    'db_queries_per_request', 'SQL-запросов на один HTTP-запрос', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    'db_time_per_request_seconds', 'Время в БД на один HTTP-запрос', ['route'],
+)
+
+# Маршрут, к которому не подошел ни один эндпоинт. Сырой путь в метку
+# не попадает, иначе сканеры раздуют число временных рядов.
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class RequestStats:
+    """SQL-запросы и время в БД текущего HTTP-запроса.
+
+    budget и statements заполняет app.querylog, если у маршрута
+    объявлен бюджет запросов.
+    """
+
+    __slots__ = ('scope', 'queries', 'db_time', 'budget', 'statements')
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.budget = None
+        self.statements = None
+
+
+# Пул потоков и run_sync наследуют контекст запроса, поэтому события
+# engine видят статистику своего запроса.
+request_stats: ContextVar[RequestStats | None] = ContextVar('request_stats', default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _finish_query(conn):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+def _handle_error(exception_context):
+    # При ошибке after_cursor_execute не вызывается, запрос учитывается здесь.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start'):
+        _finish_query(connection)
+
+
+def instrument_engine(engine):
+    """Подписывает engine на подсчет запросов и времени в БД."""
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность, коды ответов и SQL по маршрутам.
+
+    Написан на чистом ASGI, без BaseHTTPMiddleware, чтобы не добавлять
+    лишнюю задачу и очередь на каждый запрос.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # labels() каждый раз берет блокировку и проверяет метки,
+        # поэтому дочерние метрики маршрутов кэшируются.
+        self._route_metrics = {}
+        self._status_counters = {}
+
+    def _observe(self, method: str, path: str, status: int, elapsed: float,
+                 stats: RequestStats):
+        metrics = self._route_metrics.get((method, path))
+        if metrics is None:
+            metrics = self._route_metrics[method, path] = (
+                REQUEST_LATENCY.labels(method, path),
+                REQUEST_QUERIES.labels(path),
+                REQUEST_DB_TIME.labels(path),
+            )
+        latency, queries, db_time = metrics
+        latency.observe(elapsed)
+        queries.observe(stats.queries)
+        db_time.observe(stats.db_time)
+
+        counter = self._status_counters.get((method, path, status))
+        if counter is None:
+            counter = self._status_counters[method, path, status] = (
+                REQUESTS.labels(method, path, str(status)))
+        counter.inc()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_PROGRESS.dec()
+            request_stats.reset(token)
+
+            # Роутер FastAPI кладет найденный маршрут в scope.
+            route = scope.get('route')
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            self._observe(scope['method'], path, status, elapsed, stats)
+
+
+class PoolCollector:
+    """Состояние пулов соединений на момент сбора метрик.
+
+    statuses возвращает словарь: имя пула -> pool_status().
+    """
+
+    GAUGES = (('size', 'Размер пула'),
+              ('checked_out', 'Выданные соединения'),
+              ('checked_in', 'Свободные соединения'),
+              ('overflow', 'Соединения сверх пула'))
+    COUNTERS = (('checkouts', 'checkouts', 'Выдачи соединений'),
+                ('timeouts', 'timeouts', 'Таймауты ожидания соединения'),
+                ('wait_seconds', 'wait_time', 'Суммарное ожидание соединения'))
+
+    def __init__(self, statuses):
+        self._statuses = statuses
+
+    def collect(self):
+        statuses = self._statuses()
+        for name, description in self.GAUGES:
+            gauge = GaugeMetricFamily(f'db_pool_{name}', description, labels=['pool'])
+            for pool, status in statuses.items():
+                gauge.add_metric([pool], status[name])
+            yield gauge
+        for name, key, description in self.COUNTERS:
+            counter = CounterMetricFamily(f'db_pool_{name}', description, labels=['pool'])
+            for pool, status in statuses.items():
+                counter.add_metric([pool], status[key])
+            yield counter
+
+
+class HashingCollector:
+    """Пул bcrypt: очередь, отказы и время хэширования."""
+
+    def __init__(self, status):
+        self._status = status
+
+    def collect(self):
+        status = self._status()
+        yield GaugeMetricFamily('bcrypt_running', 'Хэширования в работе',
+                                value=status['running'])
+        yield GaugeMetricFamily('bcrypt_queue_depth', 'Хэширования в очереди',
+                                value=status['queue_depth'])
+        yield CounterMetricFamily('bcrypt_rejected', 'Отказы из-за полной очереди',
+                                  value=status['rejected'])
+        yield SummaryMetricFamily('bcrypt_hash_seconds', 'Время хэширования',
+                                  count_value=status['completed'],
+                                  sum_value=status['hash_time'])
+        yield CounterMetricFamily('bcrypt_wait_seconds', 'Суммарное ожидание в очереди',
+                                  value=status['wait_time'])
+
+
+class AdmissionCollector:
+    """Допуск к маршрутам авторизации: пропущенные и отклоненные запросы."""
+
+    def __init__(self, status):
+        self._status = status
+
+    def collect(self):
+        status = self._status()
+        yield GaugeMetricFamily('auth_in_flight', 'Запросы авторизации в работе',
+                                value=status['in_flight'])
+        yield CounterMetricFamily('auth_admitted', 'Пропущенные запросы авторизации',
+                                  value=status['admitted'])
+        rejected = CounterMetricFamily('auth_rejected', 'Отклоненные запросы авторизации',
+                                       labels=['reason'])
+        for reason, count in status['rejected'].items():
+            rejected.add_metric([reason], count)
+        yield rejected
+
+
+class CacheCollector:
+    """Размер и попадания кэшей воркера."""
+
+    def __init__(self, caches):
+        self._caches = caches
+
+    def collect(self):
+        size = GaugeMetricFamily('cache_size', 'Записей в кэше', labels=['cache'])
+        hits = CounterMetricFamily('cache_hits', 'Попадания в кэш', labels=['cache'])
+        misses = CounterMetricFamily('cache_misses', 'Промахи кэша', labels=['cache'])
+        for name, cache in self._caches.items():
+            status = cache.status()
+            size.add_metric([name], status['size'])
+            hits.add_metric([name], status['hits'])
+            misses.add_metric([name], status['misses'])
+        yield size
+        yield hits
+        yield misses
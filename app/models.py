@@ -1,11 +1,27 @@
-from sqlalchemy import Column, ForeignKey, MetaData, Integer, String
-from sqlalchemy.orm import relationship
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import (BigInteger, Column, Computed, DateTime, Enum, ForeignKey,
+                        Index, MetaData, Integer, SmallInteger, String)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.database import Base
-from app.schemas import RoleEnum
+from app.schemas import RoleEnum, TitleEnum
+from config import AD_TTL_DAYS
 
 metadata = MetaData()
 
+SEARCH_CONFIG = 'russian'
+
+# Сколько строк-слотов у счетчика каждой категории в ad_category_counts.
+CATEGORY_COUNTER_SLOTS = 8
+
+AdCategory = Enum(TitleEnum, name='ad_category')
+
+
+def ad_expires_at():
+    return datetime.now(timezone.utc) + timedelta(days=AD_TTL_DAYS)
+
 
 class User(Base):
     """Таблица для юзера."""
@@ -13,15 +29,18 @@ class User(Base):
     __tablename__ = 'users'
     metadata = metadata
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String, default=RoleEnum.user, nullable=True)
+    version = Column(Integer, nullable=False, server_default='1')
 
     ads = relationship('Ad', back_populates='owner')
     comments = relationship('Comment', back_populates='user')
 
+    __mapper_args__ = {'version_id_col': version}
+
     @property
     def is_admin(self):
         return self.role == 'admin'
@@ -31,27 +50,108 @@ class Ad(Base):
     """Таблица объявлений."""
 
     __tablename__ = 'ads'
+    __table_args__ = (
+        Index('ix_ads_search_vector', 'search_vector', postgresql_using='gin'),
+        # Под keyset-пагинацию с фильтром: WHERE x = ? AND id > ? ORDER BY id.
+        Index('ix_ads_category_id', 'category', 'id'),
+        Index('ix_ads_owner_id_id', 'owner_id', 'id'),
+        # По нему архивация находит истекшие объявления.
+        Index('ix_ads_expires_at', 'expires_at'),
+    )
     metadata = metadata
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String)
     description = Column(String)
     owner_id = Column(Integer, ForeignKey('users.id'))
+    # Категория из TitleEnum, если title - одно из его значений.
+    category = Column(AdCategory)
+    comment_count = Column(Integer, nullable=False, default=0,
+                           server_default='0')
+    expires_at = Column(DateTime(timezone=True), nullable=False,
+                        default=ad_expires_at)
+    version = Column(Integer, nullable=False, server_default='1')
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, ''))",
+        persisted=True)))
 
     owner = relationship('User', back_populates='ads')
-    comments = relationship('Comment', back_populates='ad')
+    comments = relationship('Comment', back_populates='ad',
+                            passive_deletes=True)
+
+    __mapper_args__ = {'version_id_col': version}
+
+
+class AdCategoryCount(Base):
+    """Счетчики объявлений по категориям для /ads/facets.
+
+    Счетчик категории разбит на CATEGORY_COUNTER_SLOTS строк: вставка
+    увеличивает случайный слот, поэтому параллельные транзакции не
+    ждут блокировку одной горячей строки. Итог - сумма по слотам.
+    """
+
+    __tablename__ = 'ad_category_counts'
+    metadata = metadata
+
+    category = Column(AdCategory, primary_key=True)
+    slot = Column(SmallInteger, primary_key=True, autoincrement=False)
+    count = Column(BigInteger, nullable=False, server_default='0')
 
 
 class Comment(Base):
     """Таблица комментариев."""
 
     __tablename__ = 'comments'
+    __table_args__ = (
+        Index('ix_comments_ad_id_id', 'ad_id', 'id'),
+    )
     metadata = metadata
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     text = Column(String)
-    owner_id = Column(Integer, ForeignKey('users.id'))
-    ad_id = Column(Integer, ForeignKey('ads.id'))
+    owner_id = Column(Integer, ForeignKey('users.id'), index=True)
+    ad_id = Column(Integer, ForeignKey('ads.id', ondelete='CASCADE'))
+    version = Column(Integer, nullable=False, server_default='1')
 
     user = relationship('User', back_populates='comments')
     ad = relationship('Ad', back_populates='comments')
+
+    __mapper_args__ = {'version_id_col': version}
+
+
+class ArchivedAd(Base):
+    """Архив истекших объявлений.
+
+    Строки переносятся сюда из ads как есть, поэтому id совпадают.
+    """
+
+    __tablename__ = 'ads_archive'
+    __table_args__ = (
+        Index('ix_ads_archive_owner_id_id', 'owner_id', 'id'),
+    )
+    metadata = metadata
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String)
+    owner_id = Column(Integer)
+    category = Column(AdCategory)
+    comment_count = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ArchivedComment(Base):
+    """Архив комментариев к истекшим объявлениям."""
+
+    __tablename__ = 'comments_archive'
+    __table_args__ = (
+        Index('ix_comments_archive_ad_id_id', 'ad_id', 'id'),
+    )
+    metadata = metadata
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    text = Column(String)
+    owner_id = Column(Integer)
+    ad_id = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False)
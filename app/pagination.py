@@ -0,0 +1,85 @@
+import base64
+import binascii
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException, Query
+
+from config import PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def encode_cursor(*values):
+    """Упаковывает ключ последней записи страницы в непрозрачный курсор."""
+
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int = 1):
+    """Распаковывает курсор обратно в ключ записи."""
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(detail='Неверный курсор!',
+                            status_code=HTTPStatus.BAD_REQUEST)
+    return values
+
+
+def decode_id_cursor(cursor: str | None):
+    """Возвращает id, после которого начинается страница."""
+
+    if cursor is None:
+        return None
+
+    after_id, = decode_cursor(cursor)
+    if not isinstance(after_id, int):
+        raise HTTPException(detail='Неверный курсор!',
+                            status_code=HTTPStatus.BAD_REQUEST)
+    return after_id
+
+
+def paginate(rows: list, limit: int, key=lambda row: (row.id,)):
+    """Формирует страницу из limit + 1 выбранных записей.
+
+    Лишняя запись нужна только для того, чтобы понять,
+    есть ли следующая страница.
+    """
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(*key(items[-1]))
+
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def decode_rank_cursor(cursor: str | None):
+    """Возвращает (ранг, id), после которых начинается страница поиска."""
+
+    if cursor is None:
+        return None
+
+    rank, after_id = decode_cursor(cursor, size=2)
+    if not isinstance(rank, (int, float)) or not isinstance(after_id, int):
+        raise HTTPException(detail='Неверный курсор!',
+                            status_code=HTTPStatus.BAD_REQUEST)
+    return rank, after_id
+
+
+class PageParams:
+    """Параметры запроса страницы: размер и курсор."""
+
+    def __init__(self,
+                 limit: int = Query(default=PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                 after: str | None = Query(default=None)):
+        self.limit = limit
+        self.after = after
+
+    @property
+    def after_id(self):
+        return decode_id_cursor(self.after)
@@ -0,0 +1,141 @@
+import logging
+import re
+import time
+
+from sqlalchemy import event
+
+from app.metrics import request_stats
+from config import QUERY_BUDGET_MODE, SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN_MS
+
+logger = logging.getLogger(__name__)
+
+BUDGET_MODES = ('off', 'warn', 'raise')
+
+if QUERY_BUDGET_MODE not in BUDGET_MODES:
+    raise ValueError(f'QUERY_BUDGET_MODE должен быть одним из {BUDGET_MODES}')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Маршрут выполнил больше SQL-запросов, чем ему разрешено."""
+
+
+def query_budget(limit: int):
+    """Зависимость маршрута: не больше limit SQL-запросов на запрос.
+
+    В режиме warn превышение пишется в лог после ответа, в режиме
+    raise запрос, который не укладывается в бюджет, падает сразу.
+    Бюджет учитывает и запрос пользователя при промахе кэша.
+    """
+
+    async def check_query_budget():
+        stats = request_stats.get()
+        if QUERY_BUDGET_MODE == 'off' or stats is None:
+            yield
+            return
+
+        stats.budget = limit
+        stats.statements = []
+        try:
+            yield
+        finally:
+            if stats.queries > limit:
+                logger.warning('%s: %d SQL-запросов при бюджете %d:\n%s',
+                               _route(stats), stats.queries, limit,
+                               '\n'.join(stats.statements))
+
+    return check_query_budget
+
+
+def _route(stats):
+    if stats is None:
+        return '-'
+    route = stats.scope.get('route')
+    return route.path if route is not None else stats.scope['path']
+
+
+def _one_line(statement: str):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+
+def parameters_shape(parameters):
+    """Типы параметров без значений: в лог не попадают пароли и почта."""
+
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f'{len(parameters)} x {parameters_shape(parameters[0])}'
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    if stats is not None and stats.statements is not None:
+        stats.statements.append(_one_line(statement))
+        if QUERY_BUDGET_MODE == 'raise' and stats.queries >= stats.budget:
+            raise QueryBudgetExceeded(
+                f'{_route(stats)}: бюджет {stats.budget} SQL-запросов превышен:\n'
+                + '\n'.join(stats.statements))
+    conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = (time.perf_counter() - conn.info['slow_query_start'].pop()) * 1000
+    if not SLOW_QUERY_MS or elapsed < SLOW_QUERY_MS:
+        return
+
+    plan = None
+    if (SLOW_QUERY_EXPLAIN_MS and elapsed >= SLOW_QUERY_EXPLAIN_MS
+            and not executemany and conn.dialect.name == 'postgresql'
+            and statement.lstrip().upper().startswith('SELECT')):
+        plan = _explain(conn, statement, parameters)
+
+    logger.warning('Медленный запрос %.1f мс, маршрут %s, параметры %s: %s%s',
+                   elapsed, _route(request_stats.get()), parameters_shape(parameters),
+                   _one_line(statement), f'\n{plan}' if plan else '')
+
+
+def _explain(conn, statement, parameters):
+    # Отдельный курсор: результат исходного запроса еще не прочитан.
+    # EXPLAIN идет в транзакции запроса, поэтому его ошибка (например,
+    # statement_timeout) откатывается до точки сохранения, иначе
+    # транзакция осталась бы прерванной и упали бы запрос и commit.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(f'EXPLAIN ANALYZE {statement}', parameters)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception as error:
+        return f'EXPLAIN ANALYZE не выполнен: {error}'
+    finally:
+        cursor.close()
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('slow_query_start'):
+        connection.info['slow_query_start'].pop()
+
+
+def instrument_engine(engine):
+    """Подписывает engine на бюджет запросов и лог медленных запросов.
+
+    При выключенных QUERY_BUDGET_MODE и SLOW_QUERY_MS ничего не
+    подписывается и запросы не платят за проверки. Подписывать нужно
+    раньше app.metrics: запрос сверх бюджета не выполняется, и
+    handle_error для него не вызывается, поэтому metrics не должен
+    успеть начать его замер.
+    """
+
+    if QUERY_BUDGET_MODE == 'off' and not SLOW_QUERY_MS:
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
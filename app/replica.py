@@ -0,0 +1,46 @@
+import time
+
+from config import READ_YOUR_WRITES_SECONDS
+
+# Кука, по которой чтения клиента идут в основную БД: реплика может
+# отставать, а клиент должен видеть то, что только что изменил.
+READ_PRIMARY_COOKIE = 'read_primary_until'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def reads_from_primary(request):
+    """Клиент недавно что-то менял и еще должен читать из основной БД."""
+
+    try:
+        return float(request.cookies[READ_PRIMARY_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """После успешного изменяющего запроса ставит куку READ_PRIMARY_COOKIE.
+
+    Кука живет READ_YOUR_WRITES_SECONDS, в ней же лежит срок, чтобы
+    не зависеть от того, соблюдает ли клиент Max-Age.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['method'] in SAFE_METHODS
+                or not READ_YOUR_WRITES_SECONDS):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                until = time.time() + READ_YOUR_WRITES_SECONDS
+                cookie = (f'{READ_PRIMARY_COOKIE}={until:.0f}; '
+                          f'Max-Age={READ_YOUR_WRITES_SECONDS}; Path=/; HttpOnly; SameSite=Lax')
+                message['headers'] = [*message.get('headers', []),
+                                      (b'set-cookie', cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
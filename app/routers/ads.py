@@ -1,11 +1,17 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from starlette.responses import JSONResponse
 
 from app import crud, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
+from app.etag import etag_matches, make_etag, not_modified
+from app.pagination import PageParams, decode_rank_cursor, paginate
+from app.querylog import query_budget
+from app.streaming import ndjson_response, wants_ndjson
+from config import ADS_BULK_MAX
 
 router = APIRouter(
     prefix='/ads',
@@ -14,37 +20,119 @@ router = APIRouter(
 )
 
 
-@router.get('/', response_model=list[schemas.AdRead])
-def read_ads(db: Session = Depends(get_db)):
-    """Возвращает список объявлений."""
+@router.get('/', response_model=schemas.Page[schemas.AdRead],
+            dependencies=[Depends(query_budget(1))])
+async def read_ads(page: PageParams = Depends(),
+                   category: schemas.TitleEnum | None = None,
+                   owner_id: int | None = None,
+                   accept: str | None = Header(default=None),
+                   db: Session = Depends(get_read_db)):
+    """Возвращает страницу объявлений.
 
-    return crud.get_ads(db)
+    Можно отфильтровать по категории и владельцу. С Accept:
+    application/x-ndjson отдает потоком все подходящие объявления
+    после курсора, limit при этом не учитывается.
+    """
 
+    if wants_ndjson(accept):
+        return ndjson_response(db, crud.select_ads(page.after_id, category, owner_id),
+                               schemas.AdRead)
 
-@router.get('/{ad_id}', response_model=schemas.AdRead)
-def read_ad(ad_id: int, db: Session = Depends(get_db)):
-    """Возвращает определенное объявление."""
+    ads = await run_db(db, crud.get_ads_fast, page.limit, page.after_id,
+                       category, owner_id)
 
-    ad = crud.get_ad(db, ad_id)
+    return ORJSONResponse(paginate(ads, page.limit, key=lambda ad: (ad['id'],)))
 
-    return ad
 
+@router.get('/search', response_model=schemas.Page[schemas.AdRead],
+            dependencies=[Depends(query_budget(1))])
+async def search_ads(q: str = Query(min_length=1, max_length=200),
+                     page: PageParams = Depends(),
+                     db: Session = Depends(get_read_db)):
+    """Ищет объявления по тексту, самые релевантные - первыми."""
+
+    rows = await run_db(db, crud.search_ads, q, page.limit,
+                        decode_rank_cursor(page.after))
+
+    result = paginate(rows, page.limit, key=lambda row: (row.rank, row.Ad.id))
+    result['items'] = [row.Ad for row in result['items']]
+
+    return result
+
+
+@router.get('/facets', response_model=list[schemas.CategoryCount],
+            dependencies=[Depends(query_budget(1))])
+async def read_facets(db: Session = Depends(get_read_db)):
+    """Возвращает количество объявлений в каждой категории.
+
+    Числа берутся из счетчиков, которые обновляются вместе с
+    объявлениями, а не из COUNT(*) по таблице ads.
+    """
+
+    return await run_db(db, crud.get_category_counts)
+
+
+@router.get('/{ad_id}', response_model=schemas.AdRead,
+            dependencies=[Depends(query_budget(2))])
+async def read_ad(ad_id: int,
+                  if_none_match: str | None = Header(default=None),
+                  db: Session = Depends(get_read_db)):
+    """Возвращает определенное объявление.
+
+    Если объявление не менялось с версии из If-None-Match, отвечает
+    304 по одной легкой выборке версий.
+    """
 
-@router.post('', response_model=schemas.AdRead)
-def create_ad(ad: schemas.AdCreate, current_user: schemas.User = Depends(crud.get_current_user),
-              db: Session = Depends(get_db)):
+    if if_none_match:
+        etag = make_etag(*await run_db(db, crud.get_ad_version, ad_id))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    ad, versions = await run_db(db, crud.get_ad_fast, ad_id)
+
+    return ORJSONResponse(ad, headers={'ETag': make_etag(*versions)})
+
+
+@router.get('/{ad_id}/comments', response_model=schemas.Page[schemas.CommentRead],
+            dependencies=[Depends(query_budget(2))])
+async def read_ad_comments(ad_id: int, page: PageParams = Depends(),
+                           db: Session = Depends(get_read_db)):
+    """Возвращает страницу комментариев к объявлению."""
+
+    comments = await run_db(db, crud.get_ad_comments, ad_id, page.limit, page.after_id)
+
+    return paginate(comments, page.limit)
+
+
+@router.post('', response_model=schemas.AdRead,
+             dependencies=[Depends(query_budget(3))])
+async def create_ad(ad: schemas.AdCreate, current_user: schemas.User = Depends(crud.get_current_user),
+                    db: Session = Depends(get_db)):
     """Создание объявления."""
 
-    ad = crud.create_ad(db, ad.title, ad.description, owner_id=current_user.id)
+    ad = await run_db(db, crud.create_ad, ad.title, ad.description, owner=current_user)
 
     return ad
 
 
-@router.delete('/{ad_id}')
-def delete_ad(ad_id: int, current_user: schemas.User = Depends(crud.get_current_user), db: Session = Depends(get_db)):
+@router.post('/bulk', response_model=list[schemas.AdRead],
+             dependencies=[Depends(query_budget(3))])
+async def create_ads(ads: list[schemas.AdCreate] = Body(min_length=1, max_length=ADS_BULK_MAX),
+                     current_user: schemas.User = Depends(crud.get_current_user),
+                     db: Session = Depends(get_db)):
+    """Создание нескольких объявлений одним запросом."""
+
+    return await run_db(db, crud.create_ads, [ad.model_dump() for ad in ads],
+                        owner=current_user)
+
+
+@router.delete('/{ad_id}',
+               dependencies=[Depends(query_budget(3))])
+async def delete_ad(ad_id: int, current_user: schemas.User = Depends(crud.get_current_user),
+                    db: Session = Depends(get_db)):
     """Удаляет определенное объявление."""
 
-    crud.delete_ad(db, ad_id, current_user)
+    await run_db(db, crud.delete_ad, ad_id, current_user)
 
     return JSONResponse(content={'detail': 'Объявление успешно удалено!'},
                         status_code=HTTPStatus.OK)
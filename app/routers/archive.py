@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.database import get_read_db, run_db
+from app.pagination import PageParams, paginate
+from app.querylog import query_budget
+
+router = APIRouter(
+    prefix='/archive',
+    tags=['archive'],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get('/ads/', response_model=schemas.Page[schemas.ArchivedAdRead],
+            dependencies=[Depends(query_budget(1))])
+async def read_archived_ads(page: PageParams = Depends(),
+                            owner_id: int | None = None,
+                            db: Session = Depends(get_read_db)):
+    """Возвращает страницу объявлений из архива."""
+
+    ads = await run_db(db, crud.get_archived_ads, page.limit, page.after_id, owner_id)
+
+    return paginate(ads, page.limit)
+
+
+@router.get('/ads/{ad_id}', response_model=schemas.ArchivedAdRead,
+            dependencies=[Depends(query_budget(1))])
+async def read_archived_ad(ad_id: int, db: Session = Depends(get_read_db)):
+    """Возвращает объявление из архива."""
+
+    return await run_db(db, crud.get_archived_ad, ad_id)
+
+
+@router.get('/ads/{ad_id}/comments',
+            response_model=schemas.Page[schemas.ArchivedCommentRead],
+            dependencies=[Depends(query_budget(2))])
+async def read_archived_ad_comments(ad_id: int, page: PageParams = Depends(),
+                                    db: Session = Depends(get_read_db)):
+    """Возвращает страницу комментариев к объявлению из архива."""
+
+    comments = await run_db(db, crud.get_archived_ad_comments, ad_id, page.limit,
+                            page.after_id)
+
+    return paginate(comments, page.limit)
@@ -1,13 +1,16 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from starlette.responses import JSONResponse
 
 from app import crud, schemas, database, security
+from app.admission import auth_admission
+from app.hashing import hashing_pool
+from app.querylog import query_budget
 
 router = APIRouter(
     tags=['auth'],
@@ -15,28 +18,36 @@ router = APIRouter(
 )
 
 
-@router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    """Регистрация пользователя."""
+def client_ip(request: Request):
+    # За прокси адрес клиента подставляет uvicorn --proxy-headers.
+    return request.client.host if request.client else None
+
 
-    db_user_by_username = crud.get_user_by_username(db, user.username)
-    db_user_by_email = crud.get_user_by_email(db, user.email)
+@router.post("/register", response_model=schemas.User,
+             dependencies=[Depends(query_budget(1))])
+async def register(user: schemas.UserCreate, request: Request,
+                   db: Session = Depends(database.get_db)):
+    """Регистрация пользователя."""
 
-    if db_user_by_username or db_user_by_email:
-        raise HTTPException(detail='Такой пользователь уже зарегистрирован!',
-                            status_code=HTTPStatus.BAD_REQUEST)
+    async with auth_admission.admit(client_ip(request), user.username):
+        hashed_password = await hashing_pool.run(security.create_password_hash, user.password)
 
-    return crud.create_user(db, **user.model_dump())
+        return await database.run_db(db, crud.create_user, user.username, user.email,
+                                     hashed_password)
 
 
-@router.post('/token', response_model=schemas.TokenRead)
-def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: Session = Depends(database.get_db)):
+@router.post('/token', response_model=schemas.TokenRead,
+             dependencies=[Depends(query_budget(1))])
+async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+                request: Request, db: Session = Depends(database.get_db)):
     """Аутентификация и получение токена."""
 
-    user = crud.get_user_by_username(db, form_data.username)
-    if not form_data or not crud.verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(detail='Неверный username или password!',
-                            status_code=HTTPStatus.BAD_REQUEST)
+    async with auth_admission.admit(client_ip(request), form_data.username):
+        user = await database.run_db(db, crud.get_user_by_username, form_data.username)
+        if not user or not await hashing_pool.run(crud.verify_password, form_data.password,
+                                                  user.hashed_password):
+            raise HTTPException(detail='Неверный username или password!',
+                                status_code=HTTPStatus.BAD_REQUEST)
 
     token = security.create_access_token(user)
 
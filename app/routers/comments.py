@@ -1,11 +1,16 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from starlette.responses import JSONResponse
 
 from app import crud, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
+from app.etag import etag_matches, make_etag, not_modified
+from app.pagination import PageParams, paginate
+from app.querylog import query_budget
+from app.streaming import ndjson_response, wants_ndjson
 
 router = APIRouter(
     prefix='/comments',
@@ -14,39 +19,68 @@ router = APIRouter(
 )
 
 
-@router.get('/', response_model=list[schemas.CommentRead])
-def get_comments(db: Session = Depends(get_db)):
-    """Возвращает список комментариев."""
+@router.get('/', response_model=schemas.Page[schemas.CommentRead],
+            dependencies=[Depends(query_budget(1))])
+async def get_comments(page: PageParams = Depends(),
+                       accept: str | None = Header(default=None),
+                       db: Session = Depends(get_read_db)):
+    """Возвращает страницу комментариев.
 
-    return crud.get_comments(db)
+    С Accept: application/x-ndjson отдает потоком все комментарии
+    после курсора, limit при этом не учитывается.
+    """
 
+    if wants_ndjson(accept):
+        return ndjson_response(db, crud.select_comments(page.after_id), schemas.CommentRead)
 
-@router.get('/{comment_id}', response_model=schemas.CommentRead)
-def get_comment(comment_id: int, db: Session = Depends(get_db)):
+    comments = await run_db(db, crud.get_comments_fast, page.limit, page.after_id)
+
+    return ORJSONResponse(paginate(comments, page.limit, key=lambda comment: (comment['id'],)))
+
+
+@router.get('/{comment_id}', response_model=schemas.CommentRead,
+            dependencies=[Depends(query_budget(2))])
+async def get_comment(comment_id: int, response: Response,
+                      if_none_match: str | None = Header(default=None),
+                      db: Session = Depends(get_read_db)):
     """Возвращает определенный комментарий"""
 
-    return crud.get_comment(db, comment_id)
+    if if_none_match:
+        etag = make_etag(*await run_db(db, crud.get_comment_version, comment_id))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    comment = await run_db(db, crud.get_comment, comment_id)
+    response.headers['ETag'] = make_etag(
+        comment.version,
+        comment.user.version if comment.user else None,
+        comment.ad.version if comment.ad else None,
+    )
+
+    return comment
 
 
-@router.post('/{ad_id}', response_model=schemas.CommentRead)
-def create_comment(ad_id: int,
-                   comment: schemas.CommentCreate,
-                   current_user: schemas.User = Depends(crud.get_current_user),
-                   db: Session = Depends(get_db)):
+@router.post('/{ad_id}', response_model=schemas.CommentRead,
+             dependencies=[Depends(query_budget(6))])
+async def create_comment(ad_id: int,
+                         comment: schemas.CommentCreate,
+                         current_user: schemas.User = Depends(crud.get_current_user),
+                         db: Session = Depends(get_db)):
     """Создание комментария к объявлению."""
 
-    comment = crud.create_comment(db, comment.text, current_user.id, ad_id)
+    comment = await run_db(db, crud.create_comment, comment.text, current_user.id, ad_id)
 
     return comment
 
 
-@router.delete('/{comment_id}')
-def delete_comment(comment_id: int,
-                   current_user: schemas.User = Depends(crud.get_current_user),
-                   db: Session = Depends(get_db)):
+@router.delete('/{comment_id}',
+               dependencies=[Depends(query_budget(3))])
+async def delete_comment(comment_id: int,
+                         current_user: schemas.User = Depends(crud.get_current_user),
+                         db: Session = Depends(get_db)):
     """Удаление комментария."""
 
-    crud.delete_comment(db, comment_id, current_user.id)
+    await run_db(db, crud.delete_comment, comment_id, current_user)
 
     return JSONResponse(content={'detail': 'Комментарий успешно удален!'},
                         status_code=HTTPStatus.OK)
@@ -0,0 +1,47 @@
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry,
+                               generate_latest, multiprocess)
+
+from app import crud, security
+from app.admission import auth_admission
+from app.database import get_pool_status, get_replica_pool_status
+from app.hashing import hashing_pool
+from app.metrics import (AdmissionCollector, CacheCollector, HashingCollector,
+                         PoolCollector)
+
+router = APIRouter(
+    tags=['monitoring'],
+)
+
+
+def pool_statuses():
+    statuses = {'primary': get_pool_status()}
+    for number, status in enumerate(get_replica_pool_status()):
+        statuses[f'replica{number}'] = status
+    return statuses
+
+
+registry = REGISTRY
+if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+    # Под gunicorn метрики запросов всех воркеров складываются из
+    # файлов в этой папке. Пулы, bcrypt, допуск и кэши - по-прежнему
+    # состояние воркера, который ответил на /metrics.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+registry.register(PoolCollector(pool_statuses))
+registry.register(HashingCollector(hashing_pool.status))
+registry.register(AdmissionCollector(auth_admission.status))
+registry.register(CacheCollector({
+    'principals': crud.principal_cache,
+    'tokens': security.token_cache,
+}))
+
+
+@router.get('/metrics', include_in_schema=False)
+async def read_metrics():
+    """Метрики воркера в формате Prometheus."""
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter
+
+from app import crud, schemas, security
+from app.admission import auth_admission
+from app.database import get_pool_status, get_replica_pool_status
+from app.hashing import hashing_pool
+
+router = APIRouter(
+    prefix='/monitoring',
+    tags=['monitoring'],
+)
+
+
+@router.get('/pool', response_model=schemas.PoolStatus)
+async def read_pool_status():
+    """Возвращает состояние пула соединений с БД."""
+
+    return get_pool_status()
+
+
+@router.get('/pool/replicas', response_model=list[schemas.PoolStatus])
+async def read_replica_pool_status():
+    """Возвращает состояние пулов соединений с репликами."""
+
+    return get_replica_pool_status()
+
+
+@router.get('/hashing', response_model=schemas.HashingStatus)
+async def read_hashing_status():
+    """Возвращает состояние пула хэширования паролей."""
+
+    return hashing_pool.status()
+
+
+@router.get('/admission', response_model=schemas.AdmissionStatus)
+async def read_admission_status():
+    """Возвращает состояние допуска к /token и /register."""
+
+    return auth_admission.status()
+
+
+@router.get('/caches', response_model=dict[str, schemas.CacheStatus])
+async def read_caches_status():
+    """Возвращает состояние кэшей воркера."""
+
+    return {
+        'principals': crud.principal_cache.status(),
+        'tokens': security.token_cache.status(),
+    }
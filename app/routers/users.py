@@ -4,7 +4,8 @@ from fastapi import APIRouter, Depends, Path, Query
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
-from app.database import get_db
+from app.database import get_db, run_db
+from app.querylog import query_budget
 
 router = APIRouter(
     prefix='/users',
@@ -13,19 +14,21 @@ router = APIRouter(
 )
 
 
-@router.get('/me', response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(crud.get_current_user)):
+@router.get('/me', response_model=schemas.User,
+            dependencies=[Depends(query_budget(1))])
+async def read_users_me(current_user: schemas.User = Depends(crud.get_current_user)):
     """Получение текущего пользователя."""
 
     return current_user
 
 
-@router.patch('/{user_id}', response_model=schemas.UserRead)
-def update_user(user_id: int,
-                current_user: schemas.User = Depends(crud.get_current_user),
-                db: Session = Depends(get_db)):
+@router.patch('/{user_id}', response_model=schemas.UserRead,
+              dependencies=[Depends(query_budget(6))])
+async def update_user(user_id: int,
+                      current_user: schemas.User = Depends(crud.get_current_user),
+                      db: Session = Depends(get_db)):
     """Изменение роли пользователя."""
 
-    user = crud.update_user_role(db, user_id, schemas.RoleEnum.admin, current_user)
+    user = await run_db(db, crud.update_user_role, user_id, schemas.RoleEnum.admin, current_user)
 
     return user
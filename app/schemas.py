@@ -1,4 +1,6 @@
+from datetime import datetime
 from enum import Enum
+from typing import Generic, TypeVar
 
 from pydantic import BaseModel, Field, EmailStr
 
@@ -9,6 +11,9 @@ class TitleEnum(str, Enum):
     service = 'Оказание услуг'
 
 
+T = TypeVar('T')
+
+
 class RoleEnum(str, Enum):
     admin = 'admin'
     user = 'user'
@@ -32,6 +37,10 @@ class User(UserBase):
     role: RoleEnum
     id: int
 
+    @property
+    def is_admin(self):
+        return self.role == RoleEnum.admin
+
 
 class Ad(AdBase):
     id: int
@@ -64,7 +73,9 @@ class TokenRead(BaseModel):
 
 class AdRead(AdBase):
     id: int
-    owner: User
+    comment_count: int = 0
+    expires_at: datetime
+    owner: User | None
 
 
 class AdCreate(AdBase):
@@ -73,9 +84,71 @@ class AdCreate(AdBase):
 
 class CommentRead(CommentBase):
     id: int
-    user: User
-    ad: Ad
+    user: User | None
+    ad: Ad | None
 
 
 class CommentCreate(CommentBase):
     pass
+
+
+class ArchivedAdRead(AdBase):
+    id: int
+    owner_id: int | None
+    comment_count: int
+    expires_at: datetime
+    archived_at: datetime
+
+
+class ArchivedCommentRead(CommentBase):
+    id: int
+    owner_id: int | None
+    ad_id: int
+    archived_at: datetime
+
+
+class CategoryCount(BaseModel):
+    category: TitleEnum
+    count: int
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time: float
+    max_wait_time: float
+
+
+class HashingStatus(BaseModel):
+    workers: int
+    queue_size: int
+    running: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    hash_time: float
+    max_hash_time: float
+    wait_time: float
+
+
+class AdmissionStatus(BaseModel):
+    max_concurrency: int
+    in_flight: int
+    admitted: int
+    rejected: dict[str, int]
+
+
+class CacheStatus(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
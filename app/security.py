@@ -1,8 +1,13 @@
+import hashlib
+import time
+
 from passlib.context import CryptContext
 from jose import jwt
 
+from app.cache import TTLCache
 from app.models import User
-from config import JWT_SECRET, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config import (JWT_SECRET, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+                    TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
 
 JWT_SECRET = JWT_SECRET
 ALGORITHM = ALGORITHM
@@ -10,6 +15,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = ACCESS_TOKEN_EXPIRE_MINUTES
 
 password_hasher = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Уже проверенные токены по sha256 от самого токена. Запись живет
+# не дольше, чем exp токена, если он задан.
+token_cache = TTLCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
 
 def create_password_hash(password):
     """Создает хэш пароля."""
@@ -30,4 +39,18 @@ def create_access_token(user: User):
 
 
 def decode_token(token):
-    return jwt.decode(token, key=JWT_SECRET, algorithms=ALGORITHM)
+    """Проверяет подпись токена и возвращает его данные."""
+
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, key=JWT_SECRET, algorithms=ALGORITHM)
+
+    ttl = None
+    if isinstance(claims.get('exp'), (int, float)):
+        ttl = claims['exp'] - time.time()
+    token_cache.set(key, claims, ttl)
+
+    return claims
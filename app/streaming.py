@@ -0,0 +1,27 @@
+from starlette.responses import StreamingResponse
+
+from app.database import stream_scalars
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(accept: str | None):
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+def ndjson_response(db_session, statement, schema, batch_size: int = 1000):
+    """Отдает результат запроса построчно в формате NDJSON.
+
+    Строки читаются серверным курсором пачками по batch_size и сразу
+    уходят клиенту, поэтому первый байт отдается без ожидания всей
+    выборки, а память воркера не зависит от размера таблицы.
+    """
+
+    async def lines():
+        async for rows in stream_scalars(db_session, statement, batch_size):
+            yield ''.join(
+                schema.model_validate(row, from_attributes=True).model_dump_json() + '\n'
+                for row in rows
+            )
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
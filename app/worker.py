@@ -0,0 +1,12 @@
+from uvicorn.workers import UvicornWorker
+
+
+class AppWorker(UvicornWorker):
+    """Воркер gunicorn на uvloop и httptools.
+
+    Штатный UvicornWorker выбирает их автоматически и молча
+    откатывается на asyncio и h11, если пакетов нет. Здесь они
+    обязательны: без них воркер не стартует, а не тихо замедляется.
+    """
+
+    CONFIG_KWARGS = {'loop': 'uvloop', 'http': 'httptools'}
@@ -0,0 +1,66 @@
+"""Сравнение двух отчетов benchmarks.load, например до и после коммита.
+
+Для каждого эндпоинта и уровня конкурентности печатает изменение
+p50/p95/p99, пропускной способности и числа SQL-запросов. Если
+что-то ухудшилось сильнее --threshold, выходит с кодом 1.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+# Метрика и направление: 1 - чем больше, тем хуже, -1 - наоборот.
+METRICS = {
+    'p50_ms': 1,
+    'p95_ms': 1,
+    'p99_ms': 1,
+    'throughput_rps': -1,
+    'queries_per_request': 1,
+}
+
+
+def load(path: str):
+    with open(path) as source:
+        report = json.load(source)
+    return {(result['scenario'], result['concurrency']): result
+            for result in report['results']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='допустимое ухудшение, доля от базового значения')
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+
+    regressions = 0
+    print(f'{"эндпоинт":<32}{"conc":>5}' + ''.join(f'{name:>22}' for name in METRICS))
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        cells = []
+        for name, direction in METRICS.items():
+            if before[name] is None or after[name] is None:
+                # Прогон с --url не считает SQL-запросы.
+                cells.append('-')
+                continue
+            change = (after[name] - before[name]) / before[name] if before[name] else 0.0
+            worse = change * direction > args.threshold
+            regressions += worse
+            cells.append(f'{before[name]:.1f}->{after[name]:.1f} '
+                         f'({change:+.0%}){"!" if worse else " "}')
+        print(f'{after["endpoint"]:<32}{key[1]:>5}' + ''.join(f'{cell:>22}' for cell in cells))
+
+    if regressions:
+        print(f'ухудшений больше {args.threshold:.0%}: {regressions}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+"""Нагрузочный прогон всех роутеров в процессе через httpx.ASGITransport.
+
+С --url запросы идут по сети в уже запущенный сервер, например в
+gunicorn с несколькими воркерами; SQL-запросы тогда не считаются.
+БД из .env заранее заполняется через benchmarks.seed. Каждый сценарий
+выполняется --requests раз на каждом уровне --concurrency. Результат -
+JSON с p50/p95/p99, пропускной способностью и числом SQL-запросов на
+запрос по каждому эндпоинту; два таких файла сравнивает
+benchmarks.compare.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.load --concurrency 1 10 50 --requests 500 --output bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import event, func, select
+
+from app import database, security
+from app.admission import auth_admission
+from app.main import app
+from app.models import Ad, Comment, User
+from app.pagination import encode_cursor
+from app.schemas import TitleEnum
+from benchmarks import sqlite
+from benchmarks.seed import SEED_PASSWORD, phrase
+from config import DB_ASYNC
+
+
+class Context:
+    """Общее состояние сценариев: объем данных, токены, созданные записи."""
+
+    def __init__(self, users: int, ads: int, comments: int, rng: random.Random):
+        self.users = users
+        self.ads = ads
+        self.comments = comments
+        self.rng = rng
+        self.tag = secrets.token_hex(4)
+        self.sequence = itertools.count(1)
+        self.registered = []
+        self.created_ads = []
+        self.created_comments = []
+        self._tokens = {}
+
+    def user_id(self):
+        return self.rng.randint(1, self.users)
+
+    def ad_id(self):
+        return self.rng.randint(1, self.ads)
+
+    def comment_id(self):
+        return self.rng.randint(1, self.comments)
+
+    def headers(self, user_id: int):
+        token = self._tokens.get(user_id)
+        if token is None:
+            # Токены выпускаются напрямую: bcrypt меряется только в login.
+            token = security.create_access_token(
+                User(username=f'user{user_id}', email=f'user{user_id}@example.com'))
+            self._tokens[user_id] = token
+        return {'Authorization': f'Bearer {token}'}
+
+
+async def register(client, ctx):
+    name = f'bench-{ctx.tag}-{next(ctx.sequence)}'
+    response = await client.post('/register', json={
+        'username': name, 'email': f'{name}@example.com', 'password': SEED_PASSWORD})
+    if response.status_code == 200:
+        ctx.registered.append(response.json()['id'])
+    return response
+
+
+async def login(client, ctx):
+    return await client.post('/token', data={
+        'username': f'user{ctx.user_id()}', 'password': SEED_PASSWORD})
+
+
+async def read_me(client, ctx):
+    return await client.get('/users/me', headers=ctx.headers(ctx.user_id()))
+
+
+async def update_user(client, ctx):
+    # Первый пользователь после seed - администратор. Повышать можно
+    # только обычных, поэтому берутся зарегистрированные в этом прогоне.
+    user_id = ctx.registered.pop() if ctx.registered else ctx.user_id()
+    return await client.patch(f'/users/{user_id}', headers=ctx.headers(1))
+
+
+async def read_ads(client, ctx):
+    return await client.get('/ads/')
+
+
+async def read_ads_deep(client, ctx):
+    return await client.get('/ads/', params={'after': encode_cursor(ctx.ad_id())})
+
+
+async def read_ads_category(client, ctx):
+    return await client.get('/ads/', params={
+        'category': ctx.rng.choice(list(TitleEnum)).value})
+
+
+async def read_ads_owner(client, ctx):
+    return await client.get('/ads/', params={'owner_id': ctx.user_id()})
+
+
+async def read_facets(client, ctx):
+    return await client.get('/ads/facets')
+
+
+async def read_ad(client, ctx):
+    return await client.get(f'/ads/{ctx.ad_id()}')
+
+
+async def read_ad_comments(client, ctx):
+    return await client.get(f'/ads/{ctx.ad_id()}/comments')
+
+
+async def search_ads(client, ctx):
+    return await client.get('/ads/search', params={'q': phrase(ctx.rng, 2)})
+
+
+async def create_ad(client, ctx):
+    user_id = ctx.user_id()
+    response = await client.post('/ads', headers=ctx.headers(user_id), json={
+        'description': phrase(ctx.rng, 8)})
+    if response.status_code == 200:
+        ctx.created_ads.append((response.json()['id'], user_id))
+    return response
+
+
+async def create_ads_bulk(client, ctx):
+    return await client.post('/ads/bulk', headers=ctx.headers(ctx.user_id()), json=[
+        {'description': phrase(ctx.rng, 8)} for _ in range(10)])
+
+
+async def delete_ad(client, ctx):
+    ad_id, user_id = ctx.created_ads.pop() if ctx.created_ads else (0, 1)
+    return await client.delete(f'/ads/{ad_id}', headers=ctx.headers(user_id))
+
+
+async def read_archived_ads(client, ctx):
+    return await client.get('/archive/ads/', params={'owner_id': ctx.user_id()})
+
+
+async def read_comments(client, ctx):
+    return await client.get('/comments/')
+
+
+async def read_comment(client, ctx):
+    return await client.get(f'/comments/{ctx.comment_id()}')
+
+
+async def create_comment(client, ctx):
+    user_id = ctx.user_id()
+    response = await client.post(f'/comments/{ctx.ad_id()}', headers=ctx.headers(user_id),
+                                 json={'text': phrase(ctx.rng, 6)})
+    if response.status_code == 200:
+        ctx.created_comments.append((response.json()['id'], user_id))
+    return response
+
+
+async def delete_comment(client, ctx):
+    comment_id, user_id = ctx.created_comments.pop() if ctx.created_comments else (0, 1)
+    return await client.delete(f'/comments/{comment_id}', headers=ctx.headers(user_id))
+
+
+# Порядок важен: update-user и удаления расходуют то, что создали
+# сценарии перед ними.
+SCENARIOS = {
+    'register': ('POST /register', register),
+    'login': ('POST /token', login),
+    'me': ('GET /users/me', read_me),
+    'update-user': ('PATCH /users/{user_id}', update_user),
+    'ads': ('GET /ads/', read_ads),
+    'ads-deep': ('GET /ads/?after=', read_ads_deep),
+    'ads-category': ('GET /ads/?category=', read_ads_category),
+    'ads-owner': ('GET /ads/?owner_id=', read_ads_owner),
+    'facets': ('GET /ads/facets', read_facets),
+    'ad': ('GET /ads/{ad_id}', read_ad),
+    'ad-comments': ('GET /ads/{ad_id}/comments', read_ad_comments),
+    'search': ('GET /ads/search', search_ads),
+    'create-ad': ('POST /ads', create_ad),
+    'create-ads-bulk': ('POST /ads/bulk', create_ads_bulk),
+    'delete-ad': ('DELETE /ads/{ad_id}', delete_ad),
+    'archive-ads': ('GET /archive/ads/?owner_id=', read_archived_ads),
+    'comments': ('GET /comments/', read_comments),
+    'comment': ('GET /comments/{comment_id}', read_comment),
+    'create-comment': ('POST /comments/{ad_id}', create_comment),
+    'delete-comment': ('DELETE /comments/{comment_id}', delete_comment),
+}
+
+# Сценарии, которые работают только на PostgreSQL.
+POSTGRESQL_ONLY = {'search'}
+
+
+class QueryCounter:
+    """Считает SQL-запросы, которые engine отправил в базу."""
+
+    def __init__(self, engine):
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+def percentile(values: list[float], percent: float):
+    """Перцентиль по методу ближайшего ранга, values отсортированы."""
+
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank - 1, 0)]
+
+
+async def run_scenario(client, ctx, func, concurrency: int, requests: int,
+                       queries: QueryCounter | None):
+    latencies = []
+    statuses = Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await func(client, ctx)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    if queries:
+        queries.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'throughput_rps': requests / elapsed,
+        'queries_per_request': queries.count / requests if queries else None,
+    }
+
+
+def table_sizes():
+    with database.engine.connect() as connection:
+        return [connection.scalar(select(func.coalesce(func.max(model.id), 0)))
+                for model in (User, Ad, Comment)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True,
+                              capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, names):
+    active_engine = database.async_engine.sync_engine if DB_ASYNC else database.engine
+    # Запросы сервера по сети идут мимо engine этого процесса.
+    queries = None if args.url else QueryCounter(active_engine)
+    users, ads, comments = table_sizes()
+    if not (users and ads and comments):
+        sys.exit('БД пустая, сначала запустите python -m benchmarks.seed')
+    ctx = Context(users, ads, comments, random.Random(args.seed))
+
+    results = []
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(
+            max_connections=max(args.concurrency)))
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                   base_url='http://bench')
+    async with client:
+        for name in names if args.warmup else []:
+            await run_scenario(client, ctx, SCENARIOS[name][1], 1, args.warmup, queries)
+
+        print(f'{"эндпоинт":<32}{"conc":>5}{"p50, мс":>10}{"p99, мс":>10}'
+              f'{"rps":>10}{"SQL":>8}', file=sys.stderr)
+        for concurrency in args.concurrency:
+            for name in names:
+                endpoint, func = SCENARIOS[name]
+                result = await run_scenario(client, ctx, func, concurrency,
+                                            args.requests, queries)
+                results.append({'scenario': name, 'endpoint': endpoint,
+                                'concurrency': concurrency, **result})
+                sql = result['queries_per_request']
+                print(f'{endpoint:<32}{concurrency:>5}{result["p50_ms"]:>10.2f}'
+                      f'{result["p99_ms"]:>10.2f}{result["throughput_rps"]:>10.0f}'
+                      f'{"-" if sql is None else f"{sql:.1f}":>8}', file=sys.stderr)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'database': active_engine.dialect.name,
+            'async': DB_ASYNC,
+            'url': args.url,
+            'users': users,
+            'ads': ads,
+            'comments': comments,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--requests', type=int, default=200,
+                        help='запросов на сценарий и уровень конкурентности')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для JSON, по умолчанию stdout')
+    parser.add_argument('--url', help='адрес запущенного сервера, например '
+                                      'http://127.0.0.1:8000; по умолчанию '
+                                      'приложение в процессе')
+    args = parser.parse_args()
+    if args.requests < 1 or min(args.concurrency) < 1:
+        parser.error('--requests и --concurrency должны быть положительными')
+
+    # Весь прогон идет с одного адреса и немногих username: с корзинами
+    # допуска замер /token и /register превратился бы в замер 429.
+    auth_admission.limits = dict.fromkeys(auth_admission.limits, (0, 0))
+
+    sqlite.install(database.engine)
+    if DB_ASYNC:
+        sqlite.install(database.async_engine.sync_engine)
+
+    names = [name for name in SCENARIOS if name in args.scenarios
+             and (name not in POSTGRESQL_ONLY
+                  or database.engine.dialect.name == 'postgresql')]
+    report = asyncio.run(run(args, names))
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as out:
+            out.write(data + '\n')
+    else:
+        print(data)
+
+
+if __name__ == '__main__':
+    main()
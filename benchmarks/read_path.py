@@ -0,0 +1,94 @@
+"""Сравнение CPU на запрос: ORM + Pydantic + json против Core + orjson.
+
+Замеряется процессорное время (без ожидания БД) на получение и
+сериализацию ответа так, как это делают эндпоинты до и после
+перехода на быстрый путь. ORM-сторона читает те же строки теми же
+запросами с joinedload, что и потоковая выгрузка. Нужна заполненная
+БД из .env.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.read_path --limit 100 --rounds 200
+"""
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import joinedload
+from starlette.responses import JSONResponse
+
+from app import crud, schemas
+from app.database import SessionLocal
+from app.models import Ad
+from app.pagination import paginate
+
+
+def orm_ads(db_session, limit):
+    page = paginate(db_session.scalars(crud.select_ads().limit(limit + 1)).all(), limit)
+    model = schemas.Page[schemas.AdRead].model_validate(page, from_attributes=True)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_ads(db_session, limit):
+    page = paginate(crud.get_ads_fast(db_session, limit), limit, key=lambda ad: (ad['id'],))
+    return ORJSONResponse(page).body
+
+
+def orm_comments(db_session, limit):
+    page = paginate(db_session.scalars(crud.select_comments().limit(limit + 1)).all(), limit)
+    model = schemas.Page[schemas.CommentRead].model_validate(page, from_attributes=True)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_comments(db_session, limit):
+    page = paginate(crud.get_comments_fast(db_session, limit), limit,
+                    key=lambda comment: (comment['id'],))
+    return ORJSONResponse(page).body
+
+
+def orm_ad(db_session, ad_id):
+    ad = db_session.get(Ad, ad_id, options=[joinedload(Ad.owner)])
+    model = schemas.AdRead.model_validate(ad, from_attributes=True)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def fast_ad(db_session, ad_id):
+    return ORJSONResponse(crud.get_ad_fast(db_session, ad_id)[0]).body
+
+
+def measure(func, arg, rounds):
+    """Среднее процессорное время одного вызова в миллисекундах."""
+
+    with SessionLocal() as db_session:
+        func(db_session, arg)
+        start = time.process_time()
+        for _ in range(rounds):
+            func(db_session, arg)
+            # Новый запрос - новая сессия без уже загруженных объектов.
+            db_session.expunge_all()
+        return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--limit', type=int, default=100, help='размер страницы')
+    parser.add_argument('--ad-id', type=int, default=1)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ('GET /ads/', orm_ads, fast_ads, args.limit),
+        ('GET /comments/', orm_comments, fast_comments, args.limit),
+        ('GET /ads/{ad_id}', orm_ad, fast_ad, args.ad_id),
+    ]
+    print(f'{"эндпоинт":<18}{"ORM, мс":>10}{"Core, мс":>10}{"экономия":>10}')
+    for name, orm, fast, arg in cases:
+        orm_time = measure(orm, arg, args.rounds)
+        fast_time = measure(fast, arg, args.rounds)
+        saved = 1 - fast_time / orm_time
+        print(f'{name:<18}{orm_time:>10.3f}{fast_time:>10.3f}{saved:>10.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Заполнение БД из .env данными для нагрузочного прогона.
+
+Подходит и PostgreSQL, и SQLite (DATABASE_URL=sqlite:///bench.db).
+На PostgreSQL строки грузятся через COPY, как в manage.py import.
+У всех пользователей пароль SEED_PASSWORD, первый - администратор.
+Комментарии распределяются по объявлениям равномерно, поэтому
+comment_count сразу согласован с таблицей comments.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.seed --users 100000 --ads 1000000 --comments 5000000 --reset
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import select, text
+
+from app import crud, dump, security
+from app.database import SessionLocal, engine
+from app.models import AdCategoryCount, ArchivedAd, ArchivedComment, metadata
+from app.schemas import TitleEnum
+from benchmarks import sqlite
+from config import AD_TTL_DAYS
+
+SEED_PASSWORD = 'benchmark'
+
+WORDS = [
+    'продаю', 'куплю', 'отдам', 'обменяю', 'срочно', 'недорого', 'новый',
+    'б/у', 'велосипед', 'самокат', 'ноутбук', 'телефон', 'диван', 'шкаф',
+    'квартира', 'гараж', 'коляска', 'ремонт', 'уборка', 'доставка',
+    'горный', 'детский', 'кожаный', 'белый', 'черный', 'торг', 'центр',
+]
+
+
+def phrase(rng: random.Random, words: int):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def user_rows(count: int, hashed_password: str):
+    for user_id in range(1, count + 1):
+        yield {
+            'id': user_id,
+            'username': f'user{user_id}',
+            'email': f'user{user_id}@example.com',
+            'hashed_password': hashed_password,
+            'role': 'admin' if user_id == 1 else 'user',
+            'version': 1,
+        }
+
+
+def ad_rows(count: int, users: int, comments: int, rng: random.Random,
+            expired: float = 0.0):
+    per_ad, extra = divmod(comments, max(count, 1))
+    now = datetime.now(timezone.utc)
+    ttl = AD_TTL_DAYS * 86400
+    for ad_id in range(1, count + 1):
+        category = rng.choice(list(TitleEnum))
+        # Доля expired объявлений уже истекла и ждет архивации.
+        expires_in = -rng.randint(1, ttl) if rng.random() < expired else rng.randint(1, ttl)
+        yield {
+            'id': ad_id,
+            'title': category.value,
+            'category': category.name,
+            'description': phrase(rng, 8),
+            'owner_id': rng.randint(1, users),
+            'comment_count': per_ad + (ad_id <= extra),
+            'expires_at': now + timedelta(seconds=expires_in),
+            'version': 1,
+        }
+
+
+def comment_rows(count: int, users: int, ads: int, rng: random.Random):
+    for comment_id in range(1, count + 1):
+        yield {
+            'id': comment_id,
+            'text': phrase(rng, 6),
+            'owner_id': rng.randint(1, users),
+            'ad_id': (comment_id - 1) % ads + 1,
+            'version': 1,
+        }
+
+
+def progress(name: str, total: int):
+    start = time.perf_counter()
+
+    def report(last_id, loaded):
+        rate = loaded / (time.perf_counter() - start)
+        print(f'\r{name}: {loaded}/{total} ({rate:.0f} строк/с)',
+              end='', file=sys.stderr, flush=True)
+
+    return report
+
+
+def insert_rows(table, rows, batch_size: int, on_batch):
+    """COPY на PostgreSQL, пачки executemany на остальных базах."""
+
+    if engine.dialect.name == 'postgresql':
+        dump.import_table(engine, table, rows, batch_size=batch_size,
+                          on_batch=on_batch)
+        return
+
+    loaded = 0
+    while batch := list(islice(rows, batch_size)):
+        with engine.begin() as connection:
+            connection.execute(table.insert(), batch)
+        loaded += len(batch)
+        on_batch(batch[-1]['id'], loaded)
+
+
+# Таблицы, которые не выгружаются, но очищаются вместе с основными.
+SIDE_TABLES = (AdCategoryCount, ArchivedAd, ArchivedComment)
+
+
+def reset():
+    with engine.begin() as connection:
+        if engine.dialect.name == 'postgresql':
+            names = ', '.join([*dump.TABLES, *(model.__tablename__ for model in SIDE_TABLES)])
+            connection.execute(text(f'TRUNCATE {names} RESTART IDENTITY CASCADE'))
+        else:
+            for model in SIDE_TABLES:
+                connection.execute(model.__table__.delete())
+            for table in reversed(dump.TABLES.values()):
+                connection.execute(table.delete())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--ads', type=int, default=1000000)
+    parser.add_argument('--comments', type=int, default=5000000)
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--expired', type=float, default=0.0,
+                        help='доля уже истекших объявлений для замера архивации')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='зерно генератора текстов')
+    parser.add_argument('--reset', action='store_true',
+                        help='очистить таблицы перед заполнением')
+    args = parser.parse_args()
+    if args.users < 1 or (args.comments and args.ads < 1):
+        parser.error('объявлениям нужны пользователи, комментариям - объявления')
+
+    sqlite.install(engine)
+    metadata.create_all(engine)
+    if args.reset:
+        reset()
+
+    with engine.connect() as connection:
+        if any(connection.scalar(select(table.c.id).limit(1))
+               for table in dump.TABLES.values()):
+            parser.error('таблицы не пустые, запустите с --reset')
+
+    rng = random.Random(args.seed)
+    hashed_password = security.create_password_hash(SEED_PASSWORD)
+    sources = {
+        'users': (args.users, user_rows(args.users, hashed_password)),
+        'ads': (args.ads, ad_rows(args.ads, args.users, args.comments, rng, args.expired)),
+        'comments': (args.comments, comment_rows(args.comments, args.users, args.ads, rng)),
+    }
+    for name, table in dump.TABLES.items():
+        total, rows = sources[name]
+        insert_rows(table, rows, args.batch_size, progress(name, total))
+        print(file=sys.stderr)
+
+    with SessionLocal() as db_session:
+        crud.recount_categories(db_session)
+
+    # После массовой загрузки планировщику нужна свежая статистика.
+    with engine.begin() as connection:
+        for name in dump.TABLES:
+            connection.execute(text(f'ANALYZE {name}'))
+
+
+if __name__ == '__main__':
+    main()
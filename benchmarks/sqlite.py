@@ -0,0 +1,31 @@
+"""Подмена PostgreSQL-специфики, чтобы бенчмарки шли на SQLite.
+
+tsvector хранится как TEXT, а to_tsvector регистрируется как обычная
+функция SQLite, поэтому вычисляемая колонка ads.search_vector
+создается и заполняется. Полнотекстовый поиск на SQLite не работает,
+его сценарий пропускается.
+"""
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(TSVECTOR, 'sqlite')
+def compile_tsvector(type_, compiler, **kw):
+    return 'TEXT'
+
+
+def _to_tsvector(config, text):
+    return ' '.join(sorted(set((text or '').lower().split())))
+
+
+def _register_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function('to_tsvector', 2, _to_tsvector,
+                                     deterministic=True)
+
+
+def install(engine):
+    """Подключает функции к каждому новому соединению engine с SQLite."""
+
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _register_functions)
@@ -0,0 +1,51 @@
+"""Сравнение скорости decode_token с кэшем проверенных токенов и без него.
+
+Запуск из корня проекта (нужен заполненный .env):
+
+    python -m benchmarks.token_cache --tokens 10 --rounds 100000
+"""
+import argparse
+import time
+
+from jose import jwt
+
+from app import security
+
+
+def run(tokens: list[str], rounds: int):
+    start = time.perf_counter()
+    for i in range(rounds):
+        security.decode_token(tokens[i % len(tokens)])
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=10,
+                        help='сколько разных клиентов присылают токены')
+    parser.add_argument('--rounds', type=int, default=100000)
+    args = parser.parse_args()
+
+    tokens = [
+        jwt.encode({'username': f'user{i}', 'email': f'user{i}@example.com'},
+                   key=security.JWT_SECRET, algorithm=security.ALGORITHM)
+        for i in range(args.tokens)
+    ]
+
+    cache = security.token_cache
+    maxsize = cache.maxsize
+
+    cache.maxsize = 0
+    cache.clear()
+    without_cache = run(tokens, args.rounds)
+
+    cache.maxsize = max(maxsize, args.tokens)
+    with_cache = run(tokens, args.rounds)
+
+    print(f'без кэша: {without_cache:12.0f} decode/s')
+    print(f'с кэшем:  {with_cache:12.0f} decode/s')
+    print(f'ускорение: x{with_cache / without_cache:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,78 @@ DB_PORT = config.get('DB_PORT')
 DB_NAME = config.get('DB_NAME')
 DB_USER = config.get('DB_USER')
 DB_PASSWORD = config.get('DB_PASSWORD')
+# Полный URL базы вместо DB_*, например sqlite:///bench.db для бенчмарков.
+DATABASE_URL = config.get('DATABASE_URL')
 
 JWT_SECRET = config.get('JWT_SECRET')
 ALGORITHM = config.get('ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = config.get('ACCESS_TOKEN_EXPIRE_MINUTES')
+
+PAGE_SIZE = int(config.get('PAGE_SIZE') or 20)
+MAX_PAGE_SIZE = int(config.get('MAX_PAGE_SIZE') or 100)
+
+DB_ASYNC = (config.get('DB_ASYNC') or '').lower() in ('1', 'true', 'yes')
+
+DB_POOL_SIZE = int(config.get('DB_POOL_SIZE') or 5)
+DB_MAX_OVERFLOW = int(config.get('DB_MAX_OVERFLOW') or 10)
+DB_POOL_TIMEOUT = float(config.get('DB_POOL_TIMEOUT') or 30)
+DB_POOL_RECYCLE = int(config.get('DB_POOL_RECYCLE') or -1)
+DB_POOL_PRE_PING = (config.get('DB_POOL_PRE_PING') or '').lower() in ('1', 'true', 'yes')
+
+# URL реплик только для чтения через запятую.
+DB_REPLICA_URLS = [url.strip() for url in (config.get('DB_REPLICA_URLS') or '').split(',')
+                   if url.strip()]
+READ_YOUR_WRITES_SECONDS = int(config.get('READ_YOUR_WRITES_SECONDS') or 10)
+
+HASH_WORKERS = int(config.get('HASH_WORKERS') or 2)
+HASH_QUEUE_SIZE = int(config.get('HASH_QUEUE_SIZE') or 32)
+
+# Допуск к /token и /register: скорость в запросах в секунду и запас
+# корзины. Скорость 0 отключает соответствующее ограничение.
+AUTH_RATE_PER_IP = float(config.get('AUTH_RATE_PER_IP') or 1)
+AUTH_BURST_PER_IP = int(config.get('AUTH_BURST_PER_IP') or 10)
+AUTH_RATE_PER_USERNAME = float(config.get('AUTH_RATE_PER_USERNAME') or 0.2)
+AUTH_BURST_PER_USERNAME = int(config.get('AUTH_BURST_PER_USERNAME') or 5)
+AUTH_GLOBAL_RATE = float(config.get('AUTH_GLOBAL_RATE') or 50)
+AUTH_GLOBAL_BURST = int(config.get('AUTH_GLOBAL_BURST') or 50)
+AUTH_MAX_CONCURRENCY = int(config.get('AUTH_MAX_CONCURRENCY') or HASH_WORKERS + HASH_QUEUE_SIZE)
+AUTH_MAX_KEYS = int(config.get('AUTH_MAX_KEYS') or 100000)
+# Общие для всех воркеров корзины в Redis, например redis://localhost:6379/0.
+RATE_LIMIT_REDIS_URL = config.get('RATE_LIMIT_REDIS_URL')
+# Таймаут подключения и ответа Redis в секундах: после него воркер
+# считает лимиты сам, а не ждет TCP-таймаута ОС.
+RATE_LIMIT_REDIS_TIMEOUT = float(config.get('RATE_LIMIT_REDIS_TIMEOUT') or 0.1)
+
+PRINCIPAL_CACHE_SIZE = int(config.get('PRINCIPAL_CACHE_SIZE') or 10000)
+PRINCIPAL_CACHE_TTL = float(config.get('PRINCIPAL_CACHE_TTL') or 60)
+
+TOKEN_CACHE_SIZE = int(config.get('TOKEN_CACHE_SIZE') or 10000)
+TOKEN_CACHE_TTL = float(config.get('TOKEN_CACHE_TTL') or 300)
+
+ADS_BULK_MAX = int(config.get('ADS_BULK_MAX') or 1000)
+
+# Срок жизни объявления, после него объявление уходит в архив.
+AD_TTL_DAYS = int(config.get('AD_TTL_DAYS') or 30)
+ARCHIVE_BATCH_SIZE = int(config.get('ARCHIVE_BATCH_SIZE') or 500)
+ARCHIVE_PAUSE_SECONDS = float(config.get('ARCHIVE_PAUSE_SECONDS') or 0.5)
+# 0 - воркеры приложения не архивируют сами, только manage.py archive.
+ARCHIVE_INTERVAL_SECONDS = float(config.get('ARCHIVE_INTERVAL_SECONDS') or 0)
+
+# Продакшен-сервер: gunicorn -c gunicorn.conf.py.
+WEB_BIND = config.get('WEB_BIND') or '0.0.0.0:8000'
+# 0 - по числу доступных процессу ядер.
+WEB_WORKERS = int(config.get('WEB_WORKERS') or 0)
+WEB_MAX_REQUESTS = int(config.get('WEB_MAX_REQUESTS') or 10000)
+WEB_MAX_REQUESTS_JITTER = int(config.get('WEB_MAX_REQUESTS_JITTER') or 1000)
+WEB_KEEPALIVE = int(config.get('WEB_KEEPALIVE') or 5)
+WEB_BACKLOG = int(config.get('WEB_BACKLOG') or 2048)
+WEB_TIMEOUT = int(config.get('WEB_TIMEOUT') or 60)
+WEB_GRACEFUL_TIMEOUT = int(config.get('WEB_GRACEFUL_TIMEOUT') or 30)
+WEB_FORWARDED_ALLOW_IPS = config.get('WEB_FORWARDED_ALLOW_IPS') or '127.0.0.1'
+WEB_PRELOAD = (config.get('WEB_PRELOAD') or '').lower() in ('1', 'true', 'yes')
+# Папка, через которую воркеры складывают метрики Prometheus.
+PROMETHEUS_MULTIPROC_DIR = config.get('PROMETHEUS_MULTIPROC_DIR')
+
+QUERY_BUDGET_MODE = (config.get('QUERY_BUDGET_MODE') or 'off').lower()
+SLOW_QUERY_MS = float(config.get('SLOW_QUERY_MS') or 0)
+SLOW_QUERY_EXPLAIN_MS = float(config.get('SLOW_QUERY_EXPLAIN_MS') or 0)
@@ -0,0 +1,56 @@
+"""Настройки gunicorn для продакшена.
+
+Запуск из корня проекта: gunicorn -c gunicorn.conf.py
+Параметры берутся из .env, см. WEB_* в config.py.
+"""
+import os
+import shutil
+
+from config import (PROMETHEUS_MULTIPROC_DIR, WEB_BACKLOG, WEB_BIND,
+                    WEB_FORWARDED_ALLOW_IPS, WEB_GRACEFUL_TIMEOUT,
+                    WEB_KEEPALIVE, WEB_MAX_REQUESTS, WEB_MAX_REQUESTS_JITTER,
+                    WEB_PRELOAD, WEB_TIMEOUT, WEB_WORKERS)
+
+wsgi_app = 'app.main:app'
+worker_class = 'app.worker.AppWorker'
+bind = WEB_BIND
+# sched_getaffinity учитывает ядра, которые процессу разрешено занимать,
+# например через taskset или cpuset контейнера.
+workers = WEB_WORKERS or len(os.sched_getaffinity(0))
+backlog = WEB_BACKLOG
+keepalive = WEB_KEEPALIVE
+timeout = WEB_TIMEOUT
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+# Воркер перезапускается после max_requests запросов, разброс не дает
+# всем воркерам уйти на перезапуск одновременно.
+max_requests = WEB_MAX_REQUESTS
+max_requests_jitter = WEB_MAX_REQUESTS_JITTER
+forwarded_allow_ips = WEB_FORWARDED_ALLOW_IPS
+preload_app = WEB_PRELOAD
+
+if PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client читает папку из окружения при импорте.
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = PROMETHEUS_MULTIPROC_DIR
+
+
+def on_starting(server):
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Файлы прошлого запуска исказили бы счетчики.
+        shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # С preload engine создан в мастере до fork: воркер получает
+        # собственные пулы и не трогает соединения родителя.
+        from app.database import reset_engines_after_fork
+
+        reset_engines_after_fork()
+
+
+def child_exit(server, worker):
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,151 @@
+"""Команды обслуживания базы данных.
+
+Запуск из корня проекта: python manage.py <команда> [параметры]
+"""
+import argparse
+import os
+import sys
+
+from app import archive, crud, dump
+from app.database import SessionLocal, engine
+from config import ARCHIVE_BATCH_SIZE, ARCHIVE_PAUSE_SECONDS
+
+
+def read_checkpoint(path: str | None):
+    """Последний обработанный id и размер файла выгрузки на тот момент.
+
+    Размер есть только у контрольной точки выгрузки в файл.
+    """
+
+    if not path or not os.path.exists(path):
+        return 0, None
+    with open(path) as checkpoint:
+        last_id, _, size = checkpoint.read().strip().partition(' ')
+    return int(last_id or 0), int(size) if size else None
+
+
+def checkpoint_writer(path: str | None, out=None):
+    def write(last_id: int, count: int):
+        if path:
+            with open(path + '.tmp', 'w') as checkpoint:
+                checkpoint.write(str(last_id))
+                if out is not None:
+                    checkpoint.write(f' {out.tell()}')
+            os.replace(path + '.tmp', path)
+        print(f'{count} строк, последний id {last_id}', file=sys.stderr)
+
+    return write
+
+
+def recount_comments(args):
+    with SessionLocal() as db_session:
+        fixed = crud.recount_comments(db_session, args.batch_size)
+    print(f'Исправлено счетчиков комментариев: {fixed}')
+
+
+def recount_categories(args):
+    with SessionLocal() as db_session:
+        total = crud.recount_categories(db_session)
+    print(f'Объявлений с категорией: {total}')
+
+
+def archive_ads(args):
+    def report(archived):
+        print(f'Перенесено {archived} объявлений', file=sys.stderr)
+
+    archived = archive.archive_expired(args.batch_size, args.pause,
+                                       args.max_batches, on_batch=report)
+    print(f'Перенесено в архив объявлений: {archived}')
+
+
+def export_table(args):
+    after_id, size = read_checkpoint(args.checkpoint)
+    out = sys.stdout
+    if args.output:
+        out = open(args.output, 'a' if after_id else 'w', newline='', encoding='utf-8')
+        # Пачка, записанная после контрольной точки, будет выгружена
+        # заново: файл обрезается до размера на момент контрольной точки.
+        if size is not None:
+            out.truncate(size)
+
+    try:
+        with engine.connect() as connection:
+            exported = dump.export_table(
+                connection, dump.TABLES[args.table], out, args.format,
+                after_id=after_id, batch_size=args.batch_size,
+                on_batch=checkpoint_writer(args.checkpoint,
+                                           out if args.output else None))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f'Выгружено строк из {args.table}: {exported}', file=sys.stderr)
+
+
+def import_table(args):
+    after_id, _ = read_checkpoint(args.checkpoint)
+    with open(args.input, newline='', encoding='utf-8') as source:
+        imported = dump.import_table(
+            engine, dump.TABLES[args.table], dump.read_rows(source, args.format),
+            after_id=after_id, batch_size=args.batch_size,
+            on_batch=checkpoint_writer(args.checkpoint))
+    print(f'Загружено строк в {args.table}: {imported}', file=sys.stderr)
+
+    # COPY не трогает счетчики категорий, они пересобираются по ads.
+    if args.table == 'ads':
+        recount_categories(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser(
+        'recount-comments',
+        help='пересчитать ads.comment_count по таблице comments')
+    command.add_argument('--batch-size', type=int, default=1000,
+                         help='сколько объявлений обновлять за одну транзакцию')
+    command.set_defaults(func=recount_comments)
+
+    command = commands.add_parser(
+        'recount-categories',
+        help='пересобрать счетчики ad_category_counts по таблице ads')
+    command.set_defaults(func=recount_categories)
+
+    command = commands.add_parser(
+        'archive', help='перенести истекшие объявления с комментариями в архив')
+    command.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                         help='сколько объявлений переносить за одну транзакцию')
+    command.add_argument('--pause', type=float, default=ARCHIVE_PAUSE_SECONDS,
+                         help='пауза между пачками в секундах')
+    command.add_argument('--max-batches', type=int,
+                         help='остановиться после стольких пачек')
+    command.set_defaults(func=archive_ads)
+
+    command = commands.add_parser(
+        'export', help='выгрузить таблицу в NDJSON или CSV')
+    command.add_argument('table', choices=dump.TABLES)
+    command.add_argument('--format', choices=dump.FORMATS, default='ndjson')
+    command.add_argument('--output', help='файл выгрузки, по умолчанию stdout')
+    command.add_argument('--batch-size', type=int, default=1000,
+                         help='сколько строк читать с сервера за раз')
+    command.add_argument('--checkpoint',
+                         help='файл с последним выгруженным id, чтобы продолжить с него')
+    command.set_defaults(func=export_table)
+
+    command = commands.add_parser(
+        'import', help='загрузить таблицу из NDJSON или CSV через COPY')
+    command.add_argument('table', choices=dump.TABLES)
+    command.add_argument('--input', required=True, help='файл выгрузки')
+    command.add_argument('--format', choices=dump.FORMATS, default='ndjson')
+    command.add_argument('--batch-size', type=int, default=10000,
+                         help='сколько строк загружать за одну транзакцию')
+    command.add_argument('--checkpoint',
+                         help='файл с последним загруженным id, чтобы продолжить с него')
+    command.set_defaults(func=import_table)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
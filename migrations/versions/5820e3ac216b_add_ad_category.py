@@ -0,0 +1,60 @@
+"""Add ad category and category counters
+
+Revision ID: 5820e3ac216b
+Revises: b4037a9426c8
+Create Date: 2026-10-18 15:12:40.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5820e3ac216b'
+down_revision: Union[str, None] = 'b4037a9426c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ad_category = postgresql.ENUM('sell', 'buy', 'service', name='ad_category',
+                              create_type=False)
+
+
+def upgrade() -> None:
+    ad_category.create(op.get_bind())
+    op.add_column('ads', sa.Column('category', ad_category, nullable=True))
+    op.execute(
+        "UPDATE ads SET category = CASE title "
+        "WHEN 'Продажа' THEN 'sell' "
+        "WHEN 'Покупка' THEN 'buy' "
+        "WHEN 'Оказание услуг' THEN 'service' "
+        "END::ad_category"
+    )
+    op.create_index('ix_ads_category_id', 'ads', ['category', 'id'], unique=False)
+    op.create_index('ix_ads_owner_id_id', 'ads', ['owner_id', 'id'], unique=False)
+    # (owner_id, id) покрывает и поиск только по owner_id.
+    op.drop_index('ix_ads_owner_id', table_name='ads')
+
+    op.create_table(
+        'ad_category_counts',
+        sa.Column('category', ad_category, nullable=False),
+        sa.Column('slot', sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column('count', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('category', 'slot'),
+    )
+    op.execute(
+        'INSERT INTO ad_category_counts (category, slot, count) '
+        'SELECT category, 0, count(*) FROM ads '
+        'WHERE category IS NOT NULL GROUP BY category'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ad_category_counts')
+    op.create_index('ix_ads_owner_id', 'ads', ['owner_id'], unique=False)
+    op.drop_index('ix_ads_owner_id_id', table_name='ads')
+    op.drop_index('ix_ads_category_id', table_name='ads')
+    op.drop_column('ads', 'category')
+    ad_category.drop(op.get_bind())
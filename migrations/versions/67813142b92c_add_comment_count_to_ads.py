@@ -0,0 +1,34 @@
+"""Add comment_count to ads
+
+Revision ID: 67813142b92c
+Revises: 9e79bc24f26b
+Create Date: 2026-10-18 11:40:53.902671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '67813142b92c'
+down_revision: Union[str, None] = '9e79bc24f26b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ads', sa.Column('comment_count', sa.Integer(),
+                                   server_default='0', nullable=False))
+    # Для больших таблиц счетчики лучше пересчитать по частям
+    # командой `python manage.py recount-comments`.
+    op.execute(
+        'UPDATE ads SET comment_count = c.count '
+        'FROM (SELECT ad_id, count(*) AS count FROM comments GROUP BY ad_id) AS c '
+        'WHERE ads.id = c.ad_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('ads', 'comment_count')
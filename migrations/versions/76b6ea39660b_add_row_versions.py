@@ -0,0 +1,29 @@
+"""Add row versions
+
+Revision ID: 76b6ea39660b
+Revises: 67813142b92c
+Create Date: 2026-10-18 12:21:08.113574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '76b6ea39660b'
+down_revision: Union[str, None] = '67813142b92c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('users', 'ads', 'comments'):
+        op.add_column(table, sa.Column('version', sa.Integer(),
+                                       server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in ('comments', 'ads', 'users'):
+        op.drop_column(table, 'version')
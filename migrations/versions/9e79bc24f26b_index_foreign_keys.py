@@ -0,0 +1,36 @@
+"""Index foreign keys
+
+Revision ID: 9e79bc24f26b
+Revises: cf5a9d9f4dad
+Create Date: 2026-10-18 11:02:17.540913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e79bc24f26b'
+down_revision: Union[str, None] = 'cf5a9d9f4dad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_comments_ad_id_id', 'comments', ['ad_id', 'id'], unique=False)
+    op.create_index(op.f('ix_comments_owner_id'), 'comments', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_ads_owner_id'), 'ads', ['owner_id'], unique=False)
+    # Первичные ключи уже проиндексированы, эти индексы только дублируют их.
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_ads_id', table_name='ads')
+    op.drop_index('ix_comments_id', table_name='comments')
+
+
+def downgrade() -> None:
+    op.create_index('ix_comments_id', 'comments', ['id'], unique=False)
+    op.create_index('ix_ads_id', 'ads', ['id'], unique=False)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.drop_index(op.f('ix_ads_owner_id'), table_name='ads')
+    op.drop_index(op.f('ix_comments_owner_id'), table_name='comments')
+    op.drop_index('ix_comments_ad_id_id', table_name='comments')
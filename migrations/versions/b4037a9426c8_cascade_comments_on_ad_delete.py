@@ -0,0 +1,29 @@
+"""Cascade comments on ad delete
+
+Revision ID: b4037a9426c8
+Revises: 76b6ea39660b
+Create Date: 2026-10-18 13:34:51.260487
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4037a9426c8'
+down_revision: Union[str, None] = '76b6ea39660b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('comments_ad_id_fkey', 'comments', type_='foreignkey')
+    op.create_foreign_key('comments_ad_id_fkey', 'comments', 'ads',
+                          ['ad_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('comments_ad_id_fkey', 'comments', type_='foreignkey')
+    op.create_foreign_key('comments_ad_id_fkey', 'comments', 'ads',
+                          ['ad_id'], ['id'])
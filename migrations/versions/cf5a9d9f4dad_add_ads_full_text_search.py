@@ -0,0 +1,34 @@
+"""Add ads full text search
+
+Revision ID: cf5a9d9f4dad
+Revises: 3a46ad2adbb6
+Create Date: 2026-10-18 10:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'cf5a9d9f4dad'
+down_revision: Union[str, None] = '3a46ad2adbb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ads', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian', coalesce(title, '') || ' ' || coalesce(description, ''))",
+                    persisted=True),
+        nullable=True))
+    op.create_index('ix_ads_search_vector', 'ads', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ads_search_vector', table_name='ads',
+                  postgresql_using='gin')
+    op.drop_column('ads', 'search_vector')
@@ -0,0 +1,74 @@
+"""Add ad expiry and archive tables
+
+Revision ID: deb9f4f12f67
+Revises: 5820e3ac216b
+Create Date: 2026-10-18 16:05:59.278193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from config import AD_TTL_DAYS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'deb9f4f12f67'
+down_revision: Union[str, None] = '5820e3ac216b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ad_category = postgresql.ENUM('sell', 'buy', 'service', name='ad_category',
+                              create_type=False)
+
+
+def upgrade() -> None:
+    # Срок существующих объявлений - AD_TTL_DAYS от миграции, как у новых.
+    # now() в DEFAULT вычисляется один раз, и PostgreSQL 11+ добавляет
+    # колонку без перезаписи таблицы и без UPDATE всех строк ads.
+    op.add_column('ads', sa.Column(
+        'expires_at', sa.DateTime(timezone=True), nullable=False,
+        server_default=sa.text(f"now() + interval '{AD_TTL_DAYS} days'")))
+    # Новым объявлениям срок ставит приложение.
+    op.alter_column('ads', 'expires_at', server_default=None)
+    # CONCURRENTLY строит индекс, не блокируя запись в ads.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_ads_expires_at', 'ads', ['expires_at'], unique=False,
+                        postgresql_concurrently=True)
+
+    op.create_table(
+        'ads_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('category', ad_category, nullable=True),
+        sa.Column('comment_count', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ads_archive_owner_id_id', 'ads_archive', ['owner_id', 'id'],
+                    unique=False)
+    op.create_table(
+        'comments_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('text', sa.String(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('ad_id', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_comments_archive_ad_id_id', 'comments_archive', ['ad_id', 'id'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comments_archive_ad_id_id', table_name='comments_archive')
+    op.drop_table('comments_archive')
+    op.drop_index('ix_ads_archive_owner_id_id', table_name='ads_archive')
+    op.drop_table('ads_archive')
+    op.drop_index('ix_ads_expires_at', table_name='ads')
+    op.drop_column('ads', 'expires_at')
@@ -0,0 +1,130 @@
+"""Тесты идут на SQLite во временной папке.
+
+config читает .env из текущей папки при импорте, поэтому .env
+тестов пишется и папка меняется до первого импорта app. Бюджеты
+запросов включены в режиме raise: маршрут, превысивший бюджет,
+падает в тесте.
+"""
+import itertools
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='adhub-tests-')
+
+with open(os.path.join(WORKDIR, '.env'), 'w') as env:
+    env.write(f'DATABASE_URL=sqlite:///{WORKDIR}/test.db\n'
+              'QUERY_BUDGET_MODE=raise\n'
+              'JWT_SECRET=test\n'
+              'ALGORITHM=HS256\n'
+              'ACCESS_TOKEN_EXPIRE_MINUTES=30\n')
+os.chdir(WORKDIR)
+sys.path.insert(0, ROOT)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import crud, security  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Ad, Comment, User, metadata  # noqa: E402
+from app.schemas import TitleEnum  # noqa: E402
+from benchmarks import sqlite  # noqa: E402
+
+sqlite.install(engine)
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    crud.principal_cache.clear()
+    yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as db_session:
+        yield db_session
+
+
+usernames = (f'user{number}' for number in itertools.count())
+
+
+def add_user(connection, role: str = 'user'):
+    username = next(usernames)
+    return connection.scalar(User.__table__.insert().returning(User.id),
+                             {'username': username, 'email': f'{username}@example.com',
+                              'hashed_password': '-', 'role': role})
+
+
+@pytest.fixture
+def login():
+    """Создает пользователя: его id и заголовок авторизации."""
+
+    def create(role: str = 'user'):
+        with engine.begin() as connection:
+            user_id = add_user(connection, role)
+        with SessionLocal() as db_session:
+            user = db_session.get(User, user_id)
+        return user_id, {'Authorization': f'Bearer {security.create_access_token(user)}'}
+
+    return create
+
+
+@pytest.fixture
+def auth_headers(login):
+    """Заголовок авторизации нового пользователя."""
+
+    return login()[1]
+
+
+@pytest.fixture
+def add_ads():
+    """Создает пользователя и count объявлений с комментариями."""
+
+    def add(count: int, comments: int = 0):
+        with engine.begin() as connection:
+            user_id = add_user(connection)
+            ad_ids = connection.scalars(
+                Ad.__table__.insert().returning(Ad.id),
+                [{'title': TitleEnum.sell.value, 'category': TitleEnum.sell.name,
+                  'description': f'Объявление {number}', 'owner_id': user_id,
+                  'comment_count': comments}
+                 for number in range(count)]).all()
+            if comments:
+                connection.execute(Comment.__table__.insert(), [
+                    {'text': 'Комментарий', 'owner_id': user_id, 'ad_id': ad_id}
+                    for ad_id in ad_ids for _ in range(comments)])
+        return ad_ids
+
+    return add
+
+
+@pytest.fixture
+def count_queries():
+    """Считает SQL-запросы к engine внутри блока with."""
+
+    @contextmanager
+    def count():
+        queries = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return count
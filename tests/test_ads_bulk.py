@@ -0,0 +1,21 @@
+def test_bulk_response_follows_input_order(client, auth_headers):
+    ads = [{'title': title, 'description': f'Объявление {number}'}
+           for number, title in enumerate(['Покупка', 'Продажа', 'Оказание услуг'] * 5)]
+
+    response = client.post('/ads/bulk', json=ads, headers=auth_headers)
+
+    assert response.status_code == 200
+    created = response.json()
+    assert [(ad['title'], ad['description']) for ad in created] == [
+        (ad['title'], ad['description']) for ad in ads]
+    assert [ad['id'] for ad in created] == sorted(ad['id'] for ad in created)
+
+
+def test_create_ad_returns_its_owner(client, login):
+    user_id, headers = login()
+
+    response = client.post('/ads', json={'title': 'Продажа', 'description': 'Новое объявление'},
+                           headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()['owner']['id'] == user_id
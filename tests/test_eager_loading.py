@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/ads/', '/comments/'])
+def test_list_queries_do_not_grow_with_page(client, add_ads, count_queries, path):
+    add_ads(20, comments=2)
+
+    counts = []
+    for limit in (1, 20):
+        with count_queries() as queries:
+            response = client.get(path, params={'limit': limit})
+        assert response.status_code == 200
+        assert len(response.json()['items']) == limit
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1] == 1
+
+
+def test_ad_comments_queries_do_not_grow_with_page(client, add_ads, count_queries):
+    ad_id, = add_ads(1, comments=20)
+
+    counts = []
+    for limit in (1, 20):
+        with count_queries() as queries:
+            response = client.get(f'/ads/{ad_id}/comments', params={'limit': limit})
+        assert response.status_code == 200
+        assert all(comment['user'] and comment['ad'] for comment in response.json()['items'])
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1] == 1
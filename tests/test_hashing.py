@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.hashing import HashingPool
+
+
+def test_cancelled_request_keeps_its_slot_until_hash_finishes():
+    pool = HashingPool(workers=1, queue_size=0)
+    release = threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(pool.run(release.wait))
+        while not pool.running:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Хэширование еще идет, поэтому место в пуле все еще занято.
+        assert pool.pending == 1
+        with pytest.raises(HTTPException):
+            await pool.run(release.wait)
+
+        release.set()
+        while pool.pending:
+            await asyncio.sleep(0.01)
+        assert await pool.run(lambda: 'hash') == 'hash'
+
+    asyncio.run(scenario())
@@ -0,0 +1,26 @@
+from sqlalchemy import update
+
+from app.database import engine
+from app.models import User
+
+
+def test_admin_deletes_foreign_ad_and_comment(client, add_ads, login):
+    ad_id, = add_ads(1, comments=1)
+    _, headers = login('admin')
+
+    assert client.delete('/comments/1', headers=headers).status_code == 200
+    assert client.delete(f'/ads/{ad_id}', headers=headers).status_code == 200
+
+
+def test_revoked_admin_role_applies_despite_cached_principal(client, add_ads, login):
+    ad_id, = add_ads(1, comments=1)
+    user_id, headers = login('admin')
+    # Пользователь попадает в кэш с ролью admin.
+    assert client.get('/users/me', headers=headers).json()['role'] == 'admin'
+
+    # Роль снята мимо кэша, как в другом воркере.
+    with engine.begin() as connection:
+        connection.execute(update(User).where(User.id == user_id).values(role='user'))
+
+    assert client.delete('/comments/1', headers=headers).status_code == 400
+    assert client.delete(f'/ads/{ad_id}', headers=headers).status_code == 400
@@ -0,0 +1,61 @@
+"""Ветки маршрутов в пределах своих бюджетов SQL-запросов.
+
+Тесты идут с QUERY_BUDGET_MODE=raise: маршрут, превысивший бюджет,
+падает с QueryBudgetExceeded.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+from app.metrics import RequestStats, request_stats
+from app.querylog import QueryBudgetExceeded
+
+
+def test_read_ad_branches(client, add_ads):
+    ad_id, = add_ads(1)
+
+    response = client.get(f'/ads/{ad_id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    assert client.get(f'/ads/{ad_id}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/ads/{ad_id}', headers={'If-None-Match': '"x"'}).status_code == 200
+    assert client.get('/ads/999').status_code == 404
+    assert client.get('/ads/999', headers={'If-None-Match': '"x"'}).status_code == 404
+
+
+def test_read_comment_branches(client, add_ads):
+    add_ads(1, comments=1)
+
+    response = client.get('/comments/1')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    assert client.get('/comments/1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/comments/1', headers={'If-None-Match': '"x"'}).status_code == 200
+    assert client.get('/comments/999').status_code == 404
+    assert client.get('/comments/999', headers={'If-None-Match': '"x"'}).status_code == 404
+
+
+def test_read_ad_comments_branches(client, add_ads):
+    empty_id, = add_ads(1)
+    commented_id, = add_ads(1, comments=2)
+
+    assert len(client.get(f'/ads/{commented_id}/comments').json()['items']) == 2
+    assert client.get(f'/ads/{empty_id}/comments').json()['items'] == []
+    assert client.get('/ads/999/comments').status_code == 404
+
+
+def test_query_over_budget_leaves_no_timers_on_connection():
+    stats = RequestStats({'path': '/test'})
+    stats.budget = 0
+    stats.statements = []
+    token = request_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(QueryBudgetExceeded):
+                connection.execute(text('SELECT 1'))
+            assert not connection.info.get('query_start')
+            assert not connection.info.get('slow_query_start')
+    finally:
+        request_stats.reset(token)
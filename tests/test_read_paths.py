@@ -0,0 +1,19 @@
+import json
+
+from sqlalchemy import update
+
+from app.database import engine
+from app.models import Ad
+
+
+def test_ownerless_ad_is_served_with_null_owner(client, add_ads):
+    ad_id, = add_ads(1)
+    with engine.begin() as connection:
+        connection.execute(update(Ad).where(Ad.id == ad_id).values(owner_id=None))
+
+    assert client.get(f'/ads/{ad_id}').json()['owner'] is None
+    assert client.get('/ads/').json()['items'][0]['owner'] is None
+
+    response = client.get('/ads/', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[0])['owner'] is None